@@ -19,6 +19,16 @@ def is_file_path(path):
         raise argparse.ArgumentTypeError(f"{path} is not a valid file")
 
 
+def is_positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
 def generate_tspans(text, width, **kwargs) -> list[TSpan]:
     spans = []
     for line in textwrap.wrap(text, width):
@@ -0,0 +1,67 @@
+import argparse
+import datetime
+import logging
+
+from base import is_file_path, is_directory_path
+from base.file_loader import FileSpreadsheetLoader
+from base.google_api import GoogleSpreadsheetLoader
+from base.server import RenderServer, RenderService
+
+
+def parse_cli_arguments():
+    parser = argparse.ArgumentParser(description="Shared tools for all scripts")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve = subparsers.add_parser("serve", help="Runs local HTTP service rendering previews")
+    serve.add_argument(
+        "-s",
+        "--secret",
+        type=is_file_path,
+        metavar="secret",
+        help="Path to the secret file, see https://developers.google.com/identity/openid-connect/openid-connect",
+    )
+    serve.add_argument(
+        "--data",
+        type=is_directory_path,
+        help="Directory with CSV file per sheet, used instead of Google Sheets",
+    )
+    serve.add_argument("--munchkin", metavar="spreadsheet_id", help="Spreadsheet ID with munchkin cards")
+    serve.add_argument("--vampires", metavar="spreadsheet_id", help="Spreadsheet ID with vampire chains")
+    serve.add_argument("--program", metavar="spreadsheet_id", help="Spreadsheet ID with camp program")
+    serve.add_argument("--date", "-d", type=datetime.date.fromisoformat, help="First day of the camp program")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    serve.add_argument("--port", "-p", type=int, default=8000, help="Port to listen on")
+    serve.add_argument("--cache-size", type=int, default=64, help="Memory limit for rendered outputs in MB")
+
+    # parse the arguments from standard input
+    return parser.parse_args()
+
+
+def main():
+    args = parse_cli_arguments()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.data:
+        loader = FileSpreadsheetLoader(args.data)
+    else:
+        loader = GoogleSpreadsheetLoader(client_secret_path=args.secret or "client_secret.json")
+    service = RenderService(
+        loader,
+        munchkin_id=args.munchkin,
+        vampires_id=args.vampires,
+        program_id=args.program,
+        date=args.date,
+        cache_bytes=args.cache_size * 1024 * 1024,
+    )
+    server = RenderServer((args.host, args.port), service)
+    logging.info(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
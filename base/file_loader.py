@@ -0,0 +1,56 @@
+import csv
+import re
+from pathlib import Path
+
+from base.schema import column_index
+
+A1_FULL_RANGE = re.compile(
+    r"^(?:'?(?P<sheet>.*?)'?!)?(?P<start_column>[A-Z]+)(?P<start_row>\d*)(?::(?P<end_column>[A-Z]+)(?P<end_row>\d*))?$"
+)
+
+
+def natural_key(text: str):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", text)]
+
+
+class FileSpreadsheetLoader:
+    """
+    Loads spreadsheet from a directory of CSV files, one file per sheet named after the sheet title.
+    Has the same interface as GoogleSpreadsheetLoader, spreadsheet ID is a subdirectory if it exists.
+    """
+
+    def __init__(self, directory: Path):
+        super().__init__()
+        self.directory = Path(directory)
+
+    def _sheets_directory(self, spreadsheet_id: str) -> Path:
+        directory = self.directory.joinpath(spreadsheet_id)
+        return directory if spreadsheet_id and directory.is_dir() else self.directory
+
+    def get_spreadsheet_range(self, spreadsheet_id: str, range_name: str):
+        match = A1_FULL_RANGE.match(range_name)
+        with open(self._sheets_directory(spreadsheet_id).joinpath(f"{match['sheet']}.csv"), newline="") as file:
+            rows = list(csv.reader(file))
+
+        first_row = int(match["start_row"] or 1) - 1
+        last_row = int(match["end_row"]) if match["end_row"] else len(rows)
+        first_column = column_index(match["start_column"])
+        last_column = column_index(match["end_column"] or match["start_column"]) + 1
+        values = [row[first_column:last_column] for row in rows[first_row:last_row]]
+
+        # Sheets API omits trailing empty cells and rows
+        for row in values:
+            while row and not row[-1]:
+                row.pop()
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def get_spreadsheet_ranges(self, spreadsheet_id: str, range_names: list[str]) -> list[list[list[str]]]:
+        return [self.get_spreadsheet_range(spreadsheet_id, range_name) for range_name in range_names]
+
+    def list_sheet_titles(self, spreadsheet_id: str) -> list[str]:
+        return sorted((path.stem for path in self._sheets_directory(spreadsheet_id).glob("*.csv")), key=natural_key)
+
+    def get_spreadsheet(self, spreadsheet_id: str, fields: str = None):
+        return {"sheets": [{"properties": {"title": title}} for title in self.list_sheet_titles(spreadsheet_id)]}
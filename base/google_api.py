@@ -1,16 +1,155 @@
+import logging
 import os.path
+import random
+import threading
+import time
+from socket import timeout as SocketTimeout
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest, build_http
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket allowing `capacity` requests per `period` seconds, blocks until a token is available"""
+
+    def __init__(self, capacity: int, period: float, clock=time.monotonic, sleep=time.sleep):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Takes one token, returns how long (in seconds) the caller had to wait for it"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+
+class RequestScheduler:
+    """
+    Executes Google API requests within the Sheets quota.
+    Requests are throttled by a token bucket, limited in concurrency and retried with exponential backoff
+    and jitter on rate limit (429) and server (5xx) errors.
+    """
+
+    # Sheets API allows 60 read requests per minute per user
+    REQUESTS_PER_MINUTE = 60
+    RETRIABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        requests_per_minute: int = REQUESTS_PER_MINUTE,
+        max_concurrent: int = 4,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 64.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.bucket = TokenBucket(requests_per_minute, 60.0, clock=clock, sleep=sleep)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.throttle_time = 0.0
+        self.backoff_time = 0.0
+
+    def is_retriable(self, error: Exception) -> bool:
+        if isinstance(error, HttpError):
+            return error.resp.status in self.RETRIABLE_STATUSES
+        return isinstance(error, (ConnectionError, SocketTimeout))
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter exponential backoff, see https://cloud.google.com/storage/docs/retry-strategy"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def _count(self, **counters):
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def execute(self, request):
+        """Executes request (anything with an `execute()` method) and returns its result"""
+        attempt = 0
+        while True:
+            with self._semaphore:
+                self._count(throttle_time=self.bucket.acquire(), requests=1)
+                try:
+                    return request.execute()
+                except Exception as error:
+                    if attempt >= self.max_retries or not self.is_retriable(error):
+                        raise
+                    delay = self.backoff(attempt)
+                    logger.warning(f"Request failed with {error}, retrying in {delay:.1f}s")
+            # Sleep outside the semaphore so other requests are not blocked by the backoff
+            self._sleep(delay)
+            self._count(retries=1, backoff_time=delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttle_time": self.throttle_time,
+            "backoff_time": self.backoff_time,
+        }
+
+
+class HttpPool:
+    """
+    Pool of authorized keep-alive connections, one per worker thread.
+    httplib2.Http is not thread-safe, so every thread gets its own connection that is reused for all its requests.
+    """
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+        self._local = threading.local()
+
+    def get(self) -> AuthorizedHttp:
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = AuthorizedHttp(self.credentials, http=build_http())
+        return http
+
+    def build_request(self, _http, *args, headers=None, **kwargs) -> HttpRequest:
+        """Request builder for `googleapiclient.discovery.build`, binds every request to the current thread connection"""
+        headers = headers or {}
+        headers.setdefault("accept-encoding", "gzip, deflate")
+        return HttpRequest(self.get(), *args, headers=headers, **kwargs)
 
 
 class GoogleSpreadsheetLoader:
     SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
 
-    def __init__(self, client_secret_path="client_secret.json"):
+    def __init__(self, client_secret_path="client_secret.json", scheduler: RequestScheduler = None):
         super().__init__()
+        self.scheduler = scheduler or RequestScheduler()
         creds = None
         # The file token.json stores the user's access and refresh tokens, and is
         # created automatically when the authorization flow completes for the first
@@ -27,13 +166,27 @@ class GoogleSpreadsheetLoader:
             # Save the credentials for the next run
             with open("token.json", "w") as token:
                 token.write(creds.to_json())
-        self.service = build("sheets", "v4", credentials=creds)
+        self.pool = HttpPool(creds)
+        self.service = build("sheets", "v4", http=self.pool.get(), requestBuilder=self.pool.build_request)
 
     def get_spreadsheet_range(self, spreadsheet_id: str, range_name: str):
         sheet = self.service.spreadsheets()
-        result = sheet.values().get(spreadsheetId=spreadsheet_id, range=range_name).execute()
+        result = self.scheduler.execute(sheet.values().get(spreadsheetId=spreadsheet_id, range=range_name))
         return result.get("values", [])
 
-    def get_spreadsheet(self, spreadsheet_id: str):
+    def get_spreadsheet_ranges(self, spreadsheet_id: str, range_names: list[str]) -> list[list[list[str]]]:
+        """Returns values of all ranges, in the same order, fetched by a single request"""
         sheet = self.service.spreadsheets()
-        return sheet.get(spreadsheetId=spreadsheet_id).execute()
+        result = self.scheduler.execute(
+            sheet.values().batchGet(spreadsheetId=spreadsheet_id, ranges=range_names, fields="valueRanges.values")
+        )
+        return [value_range.get("values", []) for value_range in result.get("valueRanges", [])]
+
+    def get_spreadsheet(self, spreadsheet_id: str, fields: str = None):
+        """Returns spreadsheet metadata, `fields` mask limits the response only to the fields that are needed"""
+        sheet = self.service.spreadsheets()
+        return self.scheduler.execute(sheet.get(spreadsheetId=spreadsheet_id, fields=fields))
+
+    def list_sheet_titles(self, spreadsheet_id: str) -> list[str]:
+        spreadsheet = self.get_spreadsheet(spreadsheet_id, fields="sheets.properties.title")
+        return [sheet["properties"]["title"] for sheet in spreadsheet.get("sheets", [])]
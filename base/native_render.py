@@ -0,0 +1,256 @@
+"""
+Renders svg.py element trees directly with cairo.
+Pages are drawn from the objects generators already build, skipping XML serialization and parsing by cairosvg.
+Follows the same rules as cairosvg for the subset of SVG the generators use.
+"""
+
+import re
+from xml.sax.saxutils import unescape
+
+import cairocffi
+from cairosvg.colors import color
+from cairosvg.surface import parse_font
+from svg import SVG, Defs, Style, Symbol, Use, Rect, Line, Path, Text, TSpan
+
+from base.pdf import PDFWriter
+
+# Units in points, 1px is 1pt same as in convert_list with its default 72 DPI
+UNITS = {"mm": 72 / 25.4, "cm": 72 / 2.54, "in": 72.0, "pt": 1.0, "px": 1.0, "": 1.0}
+LENGTH = re.compile(r"^\s*(-?[\d.]+(?:e-?\d+)?)\s*([a-z%]*)\s*$")
+PROPERTIES = {
+    "fill",
+    "stroke",
+    "stroke-width",
+    "stroke-dasharray",
+    "font-family",
+    "font-size",
+    "font-style",
+    "font-weight",
+    "text-anchor",
+    "dominant-baseline",
+}
+DEFAULT_STYLE = {"fill": "black", "stroke": "none", "stroke-width": "1", "font-family": "sans-serif", "font-size": "12"}
+CSS_RULE = re.compile(r"\.([\w-]+)\s*\{([^}]*)}")
+PATH_TOKEN = re.compile(r"[MLHVZmlhvz]|-?[\d.]+(?:e-?\d+)?")
+
+
+def length(value, reference: float = 0.0) -> float:
+    """Converts SVG length to user units, percentages are relative to the reference"""
+    number, unit = LENGTH.match(str(value)).groups()
+    if unit == "%":
+        return float(number) * reference / 100
+    return float(number) * UNITS[unit]
+
+
+def page_size(svg: SVG) -> tuple[float, float]:
+    return length(svg.width), length(svg.height)
+
+
+def parse_stylesheet(text: str) -> dict[str, dict[str, str]]:
+    rules = {}
+    for name, body in CSS_RULE.findall(text or ""):
+        declarations = rules.setdefault(name, {})
+        for declaration in body.split(";"):
+            if ":" in declaration:
+                key, value = declaration.split(":", 1)
+                declarations[key.strip()] = value.strip()
+    return rules
+
+
+class NativeRenderer:
+    """Draws SVG pages built by svg.py onto a cairo context"""
+
+    def __init__(self, context: cairocffi.Context):
+        self.context = context
+        # cairosvg draws onto a recording surface, whose text advances are rounded to whole device units
+        options = cairocffi.FontOptions()
+        options.set_hint_metrics(cairocffi.HINT_METRICS_ON)
+        self.context.set_font_options(options)
+        self.rules = {}
+        self.symbols = {}
+
+    def render(self, svg: SVG):
+        """Draws whole page, the surface must be already sized to `page_size`"""
+        self.rules = {}
+        self.symbols = {}
+        self._collect(svg)
+        width, height = page_size(svg)
+        self.context.save()
+        viewport = self._viewbox(svg.viewBox, width, height)
+        self._children(svg, DEFAULT_STYLE, viewport)
+        self.context.restore()
+
+    def _collect(self, element):
+        """Gathers stylesheet rules and symbols, they can be referenced before they are defined"""
+        for child in element.elements or []:
+            if isinstance(child, Style):
+                for name, declarations in parse_stylesheet(child.text).items():
+                    self.rules.setdefault(name, {}).update(declarations)
+            elif isinstance(child, Symbol) and child.id:
+                self.symbols[child.id] = child
+            self._collect(child)
+
+    def _viewbox(self, viewbox, width: float, height: float) -> tuple[float, float]:
+        """Applies viewBox (xMidYMid meet) to the context, returns size of the new viewport"""
+        if not viewbox:
+            return width, height
+        x, y, box_width, box_height = (float(value) for value in str(viewbox).replace(",", " ").split())
+        scale = min(width / box_width, height / box_height)
+        self.context.translate((width - box_width * scale) / 2, (height - box_height * scale) / 2)
+        self.context.scale(scale, scale)
+        self.context.translate(-x, -y)
+        return box_width, box_height
+
+    def _style(self, attributes: dict[str, str], inherited: dict[str, str]) -> dict[str, str]:
+        # Presentation attributes are overridden by stylesheet, font shorthand only fills in what is missing
+        style = dict(inherited)
+        style.update((key, value) for key, value in attributes.items() if key in PROPERTIES)
+        classes = set(attributes.get("class", "").split())
+        declarations = {}
+        for name, rule in self.rules.items():
+            if name in classes:
+                declarations.update(rule)
+        font = declarations.pop("font", None)
+        style.update(declarations)
+        if font:
+            for key, value in parse_font(font).items():
+                if value and key in PROPERTIES and key not in attributes and key not in declarations:
+                    style[key] = value
+        return style
+
+    def _children(self, element, style: dict[str, str], viewport: tuple[float, float]):
+        for child in element.elements or []:
+            self._draw(child, style, viewport)
+
+    def _draw(self, element, inherited: dict[str, str], viewport: tuple[float, float]):
+        if isinstance(element, (Style, Defs, Symbol)):
+            return
+        attributes = element.as_dict()
+        style = self._style(attributes, inherited)
+        if isinstance(element, Use):
+            self._use(attributes, style)
+        elif isinstance(element, Rect):
+            width, height = viewport
+            self.context.rectangle(
+                length(attributes.get("x", 0), width),
+                length(attributes.get("y", 0), height),
+                length(attributes["width"], width),
+                length(attributes["height"], height),
+            )
+            self._paint(style)
+        elif isinstance(element, Line):
+            width, height = viewport
+            self.context.move_to(length(attributes.get("x1", 0), width), length(attributes.get("y1", 0), height))
+            self.context.line_to(length(attributes.get("x2", 0), width), length(attributes.get("y2", 0), height))
+            self._paint(style, fill=False)
+        elif isinstance(element, Path):
+            self._path(attributes.get("d", ""))
+            self._paint(style)
+        elif isinstance(element, Text):
+            self._text(element, attributes, style, viewport)
+        else:
+            self._children(element, style, viewport)
+
+    def _use(self, attributes: dict[str, str], style: dict[str, str]):
+        symbol = self.symbols[attributes["href"].lstrip("#")]
+        self.context.save()
+        self.context.translate(length(attributes.get("x", 0)), length(attributes.get("y", 0)))
+        viewport = self._viewbox(symbol.viewBox, length(attributes["width"]), length(attributes["height"]))
+        self._children(symbol, self._style(symbol.as_dict(), style), viewport)
+        self.context.restore()
+
+    def _path(self, data: str):
+        """Supports absolute and relative M, L, H, V and Z commands"""
+        command = None
+        tokens = PATH_TOKEN.findall(data)
+        while tokens:
+            if tokens[0].isalpha():
+                command = tokens.pop(0)
+                if command in "Zz":
+                    self.context.close_path()
+                    continue
+            relative = command.islower()
+            x, y = self.context.get_current_point() if relative and self.context.has_current_point() else (0, 0)
+            if command in "Hh":
+                current_y = self.context.get_current_point()[1]
+                self.context.line_to(x + float(tokens.pop(0)), current_y)
+            elif command in "Vv":
+                current_x = self.context.get_current_point()[0]
+                self.context.line_to(current_x, y + float(tokens.pop(0)))
+            else:
+                point = x + float(tokens.pop(0)), y + float(tokens.pop(0))
+                if command in "Mm":
+                    self.context.move_to(*point)
+                    # Following pairs of coordinates are implicit line commands
+                    command = "l" if relative else "L"
+                else:
+                    self.context.line_to(*point)
+
+    def _paint(self, style: dict[str, str], fill: bool = True):
+        if fill and style["fill"] != "none":
+            self.context.set_source_rgba(*color(style["fill"]))
+            self.context.fill_preserve()
+        if style["stroke"] != "none":
+            self.context.set_source_rgba(*color(style["stroke"]))
+            self.context.set_line_width(length(style["stroke-width"]))
+            dashes = style.get("stroke-dasharray", "none")
+            self.context.set_dash(
+                [] if dashes == "none" else [length(dash) for dash in dashes.replace(",", " ").split()]
+            )
+            self.context.stroke_preserve()
+        self.context.new_path()
+
+    def _select_font(self, style: dict[str, str]):
+        weight = style.get("font-weight", "normal")
+        bold = weight == "bold" or (weight.isdigit() and int(weight) >= 550)
+        self.context.select_font_face(
+            style["font-family"].split(",")[0].strip("\"' "),
+            cairocffi.FONT_SLANT_ITALIC if style.get("font-style") == "italic" else cairocffi.FONT_SLANT_NORMAL,
+            cairocffi.FONT_WEIGHT_BOLD if bold else cairocffi.FONT_WEIGHT_NORMAL,
+        )
+        self.context.set_font_size(length(style["font-size"]))
+
+    def _show_text(self, text: str, x: float, y: float, style: dict[str, str]):
+        text = unescape(text)
+        self._select_font(style)
+        x_bearing, _, width, _, x_advance, _ = self.context.text_extents(text)
+        ascent, descent = self.context.font_extents()[:2]
+        anchor = style.get("text-anchor")
+        if anchor == "middle":
+            x -= width / 2 + x_bearing
+        elif anchor == "end":
+            x -= width + x_bearing
+        if style.get("dominant-baseline") in ("central", "middle"):
+            y += (ascent + descent) / 2 - descent
+        if style["fill"] != "none":
+            self.context.set_source_rgba(*color(style["fill"]))
+            self.context.move_to(x, y)
+            self.context.show_text(text)
+        return x + x_advance
+
+    def _text(self, element: Text, attributes: dict[str, str], style: dict[str, str], viewport: tuple[float, float]):
+        width, height = viewport
+        x = length(attributes.get("x", 0), width)
+        y = length(attributes.get("y", 0), height)
+        if element.text:
+            self._show_text(element.text, x, y, style)
+        for span in element.elements or []:
+            if not isinstance(span, TSpan):
+                continue
+            span_attributes = span.as_dict()
+            x = length(span_attributes["x"], width) if "x" in span_attributes else x
+            y = length(span_attributes["y"], height) if "y" in span_attributes else y
+            x += length(span_attributes.get("dx", 0), width)
+            y += length(span_attributes.get("dy", 0), height)
+            if span.text:
+                x = self._show_text(span.text, x, y, self._style(span_attributes, style))
+
+
+def render_pdf(pages, write_to, pages_per_file: int = None, max_memory: int = None) -> list[str]:
+    """Renders svg.py pages into PDF, each one on its own page of its own size"""
+    writer = PDFWriter(write_to, pages_per_file=pages_per_file, max_memory=max_memory)
+    for page in pages:
+        renderer = NativeRenderer(writer.start_page(*page_size(page)))
+        renderer.render(page)
+        writer.end_page()
+    return writer.finish()
@@ -1,7 +1,17 @@
+import gc
+import os
+import sys
+from pathlib import Path
+
 import cairocffi
 from cairosvg.parser import Tree
 from cairosvg.surface import PDFSurface
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 
 class RecordingPDFSurface(PDFSurface):
     surface_class = cairocffi.RecordingSurface
@@ -11,13 +21,98 @@ class RecordingPDFSurface(PDFSurface):
         return cairo_surface, width, height
 
 
-def convert_list(urls, write_to, dpi=72):
-    surface = cairocffi.PDFSurface(write_to, 1, 1)
-    context = cairocffi.Context(surface)
+def current_memory() -> int:
+    """
+    Returns resident memory of the process in bytes, peak memory where current one is not available
+    and 0 where neither is available.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        if resource is None:
+            return 0
+        # ru_maxrss is in kilobytes on Linux, but in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def split_path(path: str, index: int) -> str:
+    path = Path(path)
+    return str(path.with_name(f"{path.stem}-{index}{path.suffix}"))
+
+
+def pdf_options(args) -> dict:
+    """Returns keyword arguments of `convert_list` and `render_pdf` from `--split` and `--max-memory` options"""
+    return {"pages_per_file": args.split, "max_memory": args.max_memory and args.max_memory * 1024 * 1024}
+
+
+class PDFWriter:
+    """
+    Writes pages into PDF, every page is streamed into the file as soon as it is finished.
+    Optionally splits output into multiple files, each with at most `pages_per_file` pages,
+    and stops when the process uses more than `max_memory` bytes.
+    """
+
+    def __init__(self, write_to, pages_per_file: int = None, max_memory: int = None):
+        if pages_per_file and not isinstance(write_to, (str, os.PathLike)):
+            raise ValueError("Only output written into a file can be split")
+        self.write_to = write_to
+        self.pages_per_file = pages_per_file
+        self.max_memory = max_memory
+        self.paths = []
+        self.pages = 0
+        self.surface = None
+        self.context = None
+
+    def _open(self):
+        if self.pages_per_file:
+            write_to = split_path(self.write_to, len(self.paths) + 1)
+        else:
+            write_to = self.write_to
+        self.surface = cairocffi.PDFSurface(write_to, 1, 1)
+        self.context = cairocffi.Context(self.surface)
+        self.paths.append(str(write_to))
+
+    def start_page(self, width: float, height: float) -> cairocffi.Context:
+        if self.surface is None:
+            self._open()
+        elif self.pages_per_file and self.pages % self.pages_per_file == 0:
+            self.surface.finish()
+            self._open()
+        self.surface.set_size(width, height)
+        return self.context
+
+    def end_page(self):
+        self.surface.show_page()
+        self.pages += 1
+        if self.max_memory and current_memory() > self.max_memory:
+            gc.collect()
+            if current_memory() > self.max_memory:
+                self.finish()
+                raise MemoryError(
+                    f"Memory limit of {self.max_memory // 2**20} MB exceeded after {self.pages} pages, "
+                    f"use smaller split of the output"
+                )
+
+    def finish(self) -> list[str]:
+        """Finishes the output, returns paths of written files"""
+        if self.surface is None:
+            self._open()
+        self.surface.finish()
+        return self.paths
+
+
+def convert_list(urls, write_to, dpi=72, pages_per_file: int = None, max_memory: int = None) -> list[str]:
+    writer = PDFWriter(write_to, pages_per_file=pages_per_file, max_memory=max_memory)
     for url in urls:
         image_surface = RecordingPDFSurface(Tree(url=url), None, dpi)
-        surface.set_size(image_surface.width, image_surface.height)
+        context = writer.start_page(image_surface.width, image_surface.height)
         context.set_source_surface(image_surface.cairo, 0, 0)
         context.paint()
-        surface.show_page()
-    surface.finish()
+        # Drop the reference held by the context, so the parsed tree and recorded page can be released right away
+        context.set_source_rgb(0, 0, 0)
+        writer.end_page()
+        image_surface.cairo.finish()
+        del image_surface
+    return writer.finish()
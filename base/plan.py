@@ -0,0 +1,58 @@
+"""Dry-run planning, page counts and render time estimates calibrated by previous runs"""
+
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+
+CALIBRATION_FILE = ".render-cost.json"
+# Seconds per page used before there is any measured run
+DEFAULT_PAGE_COST = {"svg": 0.25, "native": 0.025}
+
+
+def load_page_cost(output: Path, renderer: str) -> tuple[float, bool]:
+    """Returns seconds per page measured by the last run with renderer and whether it was actually measured"""
+    try:
+        with open(output.joinpath(CALIBRATION_FILE)) as file:
+            return json.load(file)[renderer], True
+    except (OSError, ValueError, KeyError):
+        return DEFAULT_PAGE_COST[renderer], False
+
+
+def save_page_cost(output: Path, renderer: str, seconds: float, pages: int):
+    """Stores per page cost of a finished run, used by later plans"""
+    if not pages:
+        return
+    path = output.joinpath(CALIBRATION_FILE)
+    try:
+        with open(path) as file:
+            costs = json.load(file)
+    except (OSError, ValueError):
+        costs = {}
+    costs[renderer] = seconds / pages
+    with open(path, "w") as file:
+        json.dump(costs, file)
+
+
+@dataclass
+class Plan:
+    pages: int
+    page_cost: float
+    calibrated: bool
+    details: list[tuple[str, object]] = field(default_factory=list)
+
+    @property
+    def estimated_time(self) -> float:
+        return self.pages * self.page_cost
+
+    def __str__(self):
+        calibration = "measured by the last run" if self.calibrated else "default, not calibrated yet"
+        lines = [f"{label}: {value}" for label, value in self.details]
+        lines.extend(
+            [
+                f"Pages: {self.pages}",
+                f"Sheets of paper: {self.pages} (single-sided), {math.ceil(self.pages / 2)} (double-sided)",
+                f"Estimated render time: {self.estimated_time:.1f}s ({self.page_cost:.3f}s per page, {calibration})",
+            ]
+        )
+        return "\n".join(lines)
@@ -0,0 +1,126 @@
+"""Validation of raw spreadsheet rows before they are turned into entities"""
+
+import re
+import sys
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+# Check returns error message for invalid value, None otherwise
+Check = Callable[[str], Optional[str]]
+
+A1_RANGE = re.compile(r"^(?:'?(?P<sheet>.*?)'?!)?(?P<column>[A-Z]+)(?P<row>\d*)")
+
+
+@dataclass
+class CellError:
+    sheet: str
+    cell: str
+    value: str
+    message: str
+
+    def __str__(self):
+        return f"'{self.sheet}'!{self.cell}: {self.message} (got '{self.value}')"
+
+
+def column_letter(index: int) -> str:
+    """Converts zero-based column index to A1 notation letter"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def column_index(letters: str) -> int:
+    """Converts A1 notation letter to zero-based column index"""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def parse_range(range_name: str) -> tuple[str, int, int]:
+    """Returns sheet name, zero-based column index and row number of the top left cell of the range"""
+    match = A1_RANGE.match(range_name)
+    return match["sheet"] or "", column_index(match["column"]), int(match["row"] or 1)
+
+
+def required(value: str) -> Optional[str]:
+    return None if value.strip() else "must not be empty"
+
+
+def integer(value: str) -> Optional[str]:
+    try:
+        int(value)
+    except ValueError:
+        return "must be a whole number"
+    return None
+
+
+def one_of(choices: Iterable[str]) -> Check:
+    choices = [str(choice) for choice in choices]
+
+    def check(value: str) -> Optional[str]:
+        return None if value in choices else f"must be one of {', '.join(choices)}"
+
+    return check
+
+
+def mapped_by(mapping, message: str) -> Check:
+    """Value must be a whole number that is a key of mapping, e.g. RangeKeyDict"""
+
+    def check(value: str) -> Optional[str]:
+        return integer(value) or (message if mapping.get(int(value)) is None else None)
+
+    return check
+
+
+class Column:
+    def __init__(self, name: str, *checks: Check):
+        self.name = name
+        self.checks = checks
+
+    def validate(self, value: str) -> Optional[str]:
+        for check in self.checks:
+            if message := check(value):
+                return f"{self.name} {message}"
+        return None
+
+
+class Schema:
+    """Columns of a range, in order, None for columns that are not used"""
+
+    def __init__(self, *columns: Optional[Column]):
+        self.columns = columns
+
+    def is_valid(self, row: list[str]) -> bool:
+        """Returns whether all cells of a single row are valid"""
+        return all(
+            column is None or column.validate(row[index] if index < len(row) else "") is None
+            for index, column in enumerate(self.columns)
+        )
+
+    def validate(self, range_name: str, rows: list[list[str]]) -> list[CellError]:
+        """Validates all rows column by column, returns errors for every invalid cell"""
+        sheet, first_column, first_row = parse_range(range_name)
+        errors = []
+        for index, column in enumerate(self.columns):
+            if column is None:
+                continue
+            letter = column_letter(first_column + index)
+            for number, row in enumerate(rows):
+                # Sheets API does not return trailing empty cells
+                value = row[index] if index < len(row) else ""
+                if message := column.validate(value):
+                    errors.append(CellError(sheet, f"{letter}{first_row + number}", value, message))
+        return errors
+
+
+def report_errors(errors: list, validate_only: bool = False):
+    """Exits with all errors listed if there are any, exits successfully in validation only mode"""
+    if errors:
+        sys.exit("\n".join(str(error) for error in errors) + f"\nFound {len(errors)} problems")
+    if validate_only:
+        print("All data are valid")
+        sys.exit(0)
@@ -0,0 +1,43 @@
+"""Helpers for selecting only a part of the generated output by number ranges and name patterns"""
+
+import argparse
+import re
+from fnmatch import fnmatchcase
+
+from base.text_utils import remove_accents, text_to_id
+
+NUMBER_RANGE = re.compile(r"^(?P<start>\d*)(?:(?P<dash>-)(?P<end>\d*))?$")
+
+
+class NumberRanges:
+    """Set of integers given as comma separated inclusive ranges, e.g. `3-5,8,10-`"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.ranges = []
+        for part in text.split(","):
+            match = NUMBER_RANGE.match(part.strip())
+            if not match or not (match["start"] or match["end"]):
+                raise argparse.ArgumentTypeError(f"{text} is not a valid range, use e.g. 3-5,8,10-")
+            start = int(match["start"]) if match["start"] else None
+            end = int(match["end"]) if match["end"] else None
+            self.ranges.append((start, end if match["dash"] else start))
+
+    def __contains__(self, number) -> bool:
+        return any((start is None or start <= number) and (end is None or number <= end) for start, end in self.ranges)
+
+    def __repr__(self):
+        return f"NumberRanges({self.text!r})"
+
+
+def normalize_pattern(pattern: str) -> str:
+    """Normalizes glob pattern the same way as `text_to_id` normalizes names, wildcards are kept"""
+    return re.sub(r"[ ]+", "_", remove_accents(pattern.lower()))
+
+
+def matches(name: str, patterns: list[str] = None) -> bool:
+    """Returns whether ID of the name matches any of the glob patterns, any name matches when there are no patterns"""
+    if not patterns:
+        return True
+    name_id = text_to_id(name)
+    return any(fnmatchcase(name_id, normalize_pattern(pattern)) for pattern in patterns)
@@ -0,0 +1,120 @@
+"""Writing of generated SVG files, optionally compacted and compressed"""
+
+import copy
+import gzip
+import re
+from collections import Counter
+from pathlib import Path
+
+from svg import SVG, Element, Style, TSpan
+
+# svg.py attribute -> (CSS property, initial value, inherited)
+PRESENTATION_ATTRIBUTES = {
+    "fill": ("fill", "black", True),
+    "stroke": ("stroke", "none", True),
+    "stroke_width": ("stroke-width", 1, True),
+    "stroke_dasharray": ("stroke-dasharray", "none", True),
+    "font_weight": ("font-weight", "normal", True),
+    "text_anchor": ("text-anchor", "start", True),
+    "dominant_baseline": ("dominant-baseline", "auto", False),
+}
+GEOMETRY_ATTRIBUTES = {"x", "y", "x1", "y1", "x2", "y2", "dx", "dy"}
+CSS_RULE = re.compile(r"\.([\w-]+)\s*\{([^}]*)}")
+
+
+def _round(value, precision: int):
+    if isinstance(value, float):
+        value = round(value, precision)
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def _simplify(element: Element, inherited: dict, precision: int):
+    """Rounds numbers and drops attributes that are equal to their default or inherited value"""
+    values = dict(inherited)
+    for name, value in vars(element).items():
+        if value is None or name in ("elements", "text"):
+            continue
+        value = _round(value, precision)
+        if name in PRESENTATION_ATTRIBUTES:
+            _, initial, is_inherited = PRESENTATION_ATTRIBUTES[name]
+            if str(value) == str(inherited[name] if is_inherited else initial):
+                value = None
+            elif is_inherited:
+                values[name] = value
+        # tspan positions are absolute, missing one means something else than 0
+        elif name in GEOMETRY_ATTRIBUTES and value == 0 and not isinstance(element, TSpan):
+            value = None
+        setattr(element, name, value)
+    for child in element.elements or []:
+        if not isinstance(child, Style):
+            _simplify(child, values, precision)
+
+
+def _walk(element: Element):
+    yield element
+    for child in element.elements or []:
+        yield from _walk(child)
+
+
+def compact_svg(svg: SVG, precision: int = 2) -> SVG:
+    """
+    Returns smaller copy of the svg.
+    Numbers are rounded to `precision` decimal places, redundant attributes are dropped,
+    presentation attributes repeated on multiple elements are merged into CSS classes
+    and rules for classes that are not used are removed from the stylesheet.
+    """
+    svg = copy.deepcopy(svg)
+    _simplify(svg, {name: initial for name, (_, initial, _) in PRESENTATION_ATTRIBUTES.items()}, precision)
+
+    elements = [element for element in _walk(svg) if hasattr(element, "class_")]
+
+    def presentation(element):
+        return tuple(
+            (name, str(getattr(element, name)))
+            for name in PRESENTATION_ATTRIBUTES
+            if getattr(element, name, None) is not None
+        )
+
+    counts = Counter(presentation(element) for element in elements)
+    classes = {key: f"p{index}" for index, key in enumerate(key for key, count in counts.items() if key and count > 1)}
+    for element in elements:
+        key = presentation(element)
+        if key in classes:
+            for name, _ in key:
+                setattr(element, name, None)
+            element.class_ = (element.class_ or []) + [classes[key]]
+
+    used = {name for element in elements for name in element.class_ or []}
+    # Generated rules go first, so the existing rules win over them same as they did over the attributes
+    rules = [
+        f".{name}{{{';'.join(f'{PRESENTATION_ATTRIBUTES[attribute][0]}:{value}' for attribute, value in key)}}}"
+        for key, name in classes.items()
+    ]
+    styles = [element for element in _walk(svg) if isinstance(element, Style)]
+    for style in styles:
+        for name, body in CSS_RULE.findall(style.text or ""):
+            if name in used:
+                body = re.sub(r"\s*([:;])\s*", r"\1", body.strip()).rstrip(";")
+                rules.append(f".{name}{{{body}}}")
+        style.text = None
+    if styles:
+        styles[0].text = "".join(rules)
+    elif rules:
+        svg.elements.insert(0, Style(text="".join(rules)))
+    return svg
+
+
+def write_svg(svg: SVG, path: Path, compact: bool = False, precision: int = 2, compress: bool = False) -> str:
+    """Writes svg into path (with .svgz suffix if compressed), returns the path it was written to"""
+    if compact:
+        svg = compact_svg(svg, precision)
+    content = svg.as_str().encode("utf-8")
+    if compress:
+        path = path.with_suffix(".svgz")
+        with gzip.open(path, "wb") as file:
+            file.write(content)
+    else:
+        with open(path, "wb") as file:
+            file.write(content)
+    return str(path)
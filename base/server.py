@@ -0,0 +1,268 @@
+"""Local HTTP service rendering previews of cards, pages and summaries with warm caches"""
+
+import datetime
+import hashlib
+import io
+import logging
+import re
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from googleapiclient.errors import HttpError
+from svg import Use
+
+from base.cache import LRUCache
+from base.native_render import render_pdf
+from base.text_utils import text_to_id
+from munchkin import __main__ as munchkin
+from munchkin.utils import cluster, expand
+from program import __main__ as program
+from vampires import __main__ as vampires
+from vampires.chain import group_people, validate_groups, validate_chain, link_chain
+from vampires.entity import Person
+
+logger = logging.getLogger(__name__)
+
+SVG_TYPE = "image/svg+xml"
+PDF_TYPE = "application/pdf"
+MARKDOWN_TYPE = "text/markdown; charset=utf-8"
+# Placeholder for vampires sheet without groups
+NO_GROUP = "_"
+DATASETS = ("munchkin", "vampires", "program")
+
+
+class NotFoundError(Exception):
+    """Requested dataset, card, page or person does not exist"""
+
+
+class DataError(Exception):
+    """Spreadsheet data are not valid"""
+
+    def __init__(self, errors: list):
+        super().__init__("\n".join(str(error) for error in errors))
+        self.errors = errors
+
+
+def lookup(items: dict, key, label: str):
+    """Returns the requested item, missing one is reported as not found before anything is rendered"""
+    try:
+        return items[key]
+    except KeyError:
+        raise NotFoundError(f"{label} {key} not found") from None
+
+
+class RenderService:
+    """
+    Keeps single loader, parsed entities and rendered outputs in memory.
+    Parsed data are kept until `reload`, rendered outputs are in LRU cache limited to `cache_bytes`.
+    """
+
+    def __init__(
+        self,
+        loader,
+        munchkin_id: str = None,
+        vampires_id: str = None,
+        program_id: str = None,
+        date: datetime.date = None,
+        cache_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.loader = loader
+        self.munchkin_id = munchkin_id
+        self.vampires_id = vampires_id
+        self.program_id = program_id
+        self.date = date
+        self.cache = LRUCache(cache_bytes)
+        self._data = {}
+        # Lock per dataset, slow load of one spreadsheet does not block requests for the others
+        self._locks = {name: threading.Lock() for name in DATASETS}
+
+    def _load(self, name: str, factory):
+        with self._locks[name]:
+            if name not in self._data:
+                self._data[name] = factory()
+            return self._data[name]
+
+    def reload(self):
+        for name, lock in self._locks.items():
+            with lock:
+                self._data.pop(name, None)
+        self.cache.clear()
+
+    def munchkin_data(self) -> tuple[dict, list[list]]:
+        """Returns unique cards by their ID and cards split into pages"""
+
+        def load():
+            if not self.munchkin_id:
+                raise NotFoundError("munchkin spreadsheet is not configured")
+            rows = munchkin.fetch_rows(self.loader, self.munchkin_id)
+            if errors := munchkin.validate_rows(rows):
+                raise DataError(errors)
+            equipment, monsters, curses, bonuses = munchkin.load_entities(rows)
+            unique_entities = bonuses + monsters + equipment + curses
+            cards = {text_to_id(entity.name): entity for entity in unique_entities}
+            return cards, cluster(expand(unique_entities), munchkin.ROWS * munchkin.COLUMNS)
+
+        return self._load("munchkin", load)
+
+    def munchkin_card(self, card: str) -> bytes:
+        entity = lookup(self.munchkin_data()[0], card, "card")
+
+        def render():
+            svg, defs = munchkin.create_svg()
+            svg.width, svg.height, svg.viewBox = "80mm", "30mm", "0 0 80 30"
+            defs.elements.append(entity.symbol)
+            svg.elements.append(Use(href="#" + entity.symbol.id, x=0, y=0, width=80, height=30))
+            return svg.as_str().encode("utf-8")
+
+        return self.cache.get_or_create(("munchkin", "card", card), render)
+
+    def munchkin_page(self, number: str) -> bytes:
+        # Pages are numbered from 1, the same as files written by the munchkin script
+        pages = dict(enumerate(self.munchkin_data()[1], start=1))
+        page = lookup(pages, int(number), "page")
+
+        def render():
+            return munchkin.create_page(page).as_str().encode("utf-8")
+
+        return self.cache.get_or_create(("munchkin", "page", number), render)
+
+    def munchkin_pdf(self) -> bytes:
+        def render():
+            file = io.BytesIO()
+            render_pdf([munchkin.create_page(page) for page in self.munchkin_data()[1]], file)
+            return file.getvalue()
+
+        return self.cache.get_or_create(("munchkin", "pdf"), render)
+
+    def vampires_data(self) -> dict[str, dict[int, object]]:
+        """Returns linked people by their group ID and position"""
+
+        def load():
+            if not self.vampires_id:
+                raise NotFoundError("vampires spreadsheet is not configured")
+            rows = self.loader.get_spreadsheet_range(self.vampires_id, vampires.RANGE)
+            errors = Person.SCHEMA.validate(vampires.RANGE, rows)
+            groups = group_people([Person.from_list(value) for value in rows if Person.SCHEMA.is_valid(value)])
+            errors.extend(validate_groups(groups))
+            errors.extend(error for group, members in groups.items() for error in validate_chain(group, members))
+            if errors:
+                raise DataError(errors)
+            return {
+                text_to_id(group) or NO_GROUP: {person.position: person for person in link_chain(members)}
+                for group, members in groups.items()
+            }
+
+        return self._load("vampires", load)
+
+    def vampire_page(self, group: str, side: str, position: str) -> bytes:
+        person = lookup(lookup(self.vampires_data(), group, "group"), int(position), "position")
+
+        def render():
+            page = vampires.front_page(person) if side == "front" else vampires.cover_page(person)
+            return page.as_str().encode("utf-8")
+
+        return self.cache.get_or_create(("vampires", group, side, position), render)
+
+    def vampires_pdf(self, group: str) -> bytes:
+        people = lookup(self.vampires_data(), group, "group")
+
+        def render():
+            pages = []
+            for person in people.values():
+                pages.extend((vampires.front_page(person), vampires.cover_page(person)))
+            file = io.BytesIO()
+            render_pdf(pages, file)
+            return file.getvalue()
+
+        return self.cache.get_or_create(("vampires", group, "pdf"), render)
+
+    def program_summary(self) -> bytes:
+        def load():
+            if not self.program_id or not self.date:
+                raise NotFoundError("program spreadsheet or date is not configured")
+            day_names, summary_raw, day_rows = program.fetch_rows(self.loader, self.program_id)
+            if errors := program.validate_rows(day_names, summary_raw, day_rows):
+                raise DataError(errors)
+            return program.load_days(day_names, summary_raw, day_rows, self.date)
+
+        return self.cache.get_or_create(
+            ("program", "summary"), lambda: program.create_summary(self._load("program", load)).encode("utf-8")
+        )
+
+
+ROUTES = [
+    (re.compile(r"^/munchkin/cards/(?P<card>[\w-]+)\.svg$"), "munchkin_card", SVG_TYPE),
+    (re.compile(r"^/munchkin/pages/(?P<number>\d+)\.svg$"), "munchkin_page", SVG_TYPE),
+    (re.compile(r"^/munchkin/output\.pdf$"), "munchkin_pdf", PDF_TYPE),
+    (
+        re.compile(r"^/vampires/(?P<group>[\w-]+)/(?P<side>front|cover)/(?P<position>\d+)\.svg$"),
+        "vampire_page",
+        SVG_TYPE,
+    ),
+    (re.compile(r"^/vampires/(?P<group>[\w-]+)/output\.pdf$"), "vampires_pdf", PDF_TYPE),
+    (re.compile(r"^/program/summary\.md$"), "program_summary", MARKDOWN_TYPE),
+]
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server: "RenderServer"
+
+    def _send(self, status: HTTPStatus, body: bytes = b"", content_type: str = "text/plain; charset=utf-8", etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        for pattern, method, content_type in ROUTES:
+            if match := pattern.match(path):
+                break
+        else:
+            return self._send(HTTPStatus.NOT_FOUND, b"Unknown endpoint")
+
+        try:
+            body = getattr(self.server.service, method)(**match.groupdict())
+        except DataError as error:
+            return self._send(HTTPStatus.UNPROCESSABLE_ENTITY, str(error).encode("utf-8"))
+        except NotFoundError as error:
+            return self._send(HTTPStatus.NOT_FOUND, str(error).encode("utf-8"))
+        except (HttpError, OSError) as error:
+            logger.exception("Loading data for %s failed", path)
+            return self._send(HTTPStatus.BAD_GATEWAY, f"Loading data failed: {error}".encode("utf-8"))
+        except Exception as error:
+            logger.exception("Rendering %s failed", path)
+            return self._send(HTTPStatus.INTERNAL_SERVER_ERROR, f"Rendering failed: {error}".encode("utf-8"))
+
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._send(HTTPStatus.OK, body, content_type, etag)
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        if self.path != "/reload":
+            return self._send(HTTPStatus.NOT_FOUND, b"Unknown endpoint")
+        self.server.service.reload()
+        self._send(HTTPStatus.NO_CONTENT)
+
+    def log_message(self, format, *args):
+        logger.info(format, *args)
+
+
+class RenderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: RenderService):
+        super().__init__(address, RequestHandler)
+        self.service = service
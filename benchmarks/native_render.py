@@ -0,0 +1,35 @@
+"""Compares speed of the native renderer with the cairosvg pipeline on a large generated deck"""
+
+import tempfile
+import time
+from pathlib import Path
+
+from base.native_render import render_pdf
+from base.pdf import convert_list
+from base.serialization import write_svg
+from munchkin import __main__ as munchkin
+from munchkin.entity import Monster
+from munchkin.utils import cluster, expand
+
+
+def main():
+    monsters = [Monster(amount=3, name=f"Příšera {number}", level=number % 30 + 1) for number in range(300)]
+    # Symbols are cached by entities, build them before any measurement
+    pages = [munchkin.create_page(cards) for cards in cluster(expand(monsters), munchkin.ROWS * munchkin.COLUMNS)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        start = time.perf_counter()
+        paths = [write_svg(page, directory.joinpath(f"file{number}.svg")) for number, page in enumerate(pages)]
+        convert_list(paths, str(directory.joinpath("svg.pdf")))
+        svg_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        render_pdf(pages, str(directory.joinpath("native.pdf")))
+        native_time = time.perf_counter() - start
+
+    print(f"{len(pages)} pages: svg {svg_time:.2f}s, native {native_time:.2f}s, {svg_time / native_time:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
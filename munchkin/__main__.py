@@ -1,15 +1,23 @@
 import argparse
-from glob import glob
+import sys
+import time
 from pathlib import Path
 from textwrap import dedent
 
 from svg import SVG, Defs, Use, Style
 
 from .entity import Equipment, Monster, Curse, Bonus
+from .index import TYPES, build_index, select
+from .simulation import simulate, format_report
 from .utils import cluster, expand
-from base import is_file_path
+from base import is_file_path, is_positive_int
 from base.google_api import GoogleSpreadsheetLoader
-from base.pdf import convert_list
+from base.native_render import render_pdf
+from base.pdf import convert_list, pdf_options
+from base.plan import Plan, load_page_cost, save_page_cost
+from base.schema import CellError, report_errors
+from base.selection import NumberRanges
+from base.serialization import write_svg
 
 ROWS = 7
 COLUMNS = 3
@@ -18,6 +26,7 @@ EQUIPMENT_RANGE = "'Vybavení'!B2:F"
 MONSTER_RANGE = "'Příšerky'!B2:D"
 CURSE_RANGE = "'Kletby'!B2:D"
 BONUS_RANGE = "'Bonus'!B2:E"
+RANGES = {Equipment: EQUIPMENT_RANGE, Monster: MONSTER_RANGE, Curse: CURSE_RANGE, Bonus: BONUS_RANGE}
 
 
 def create_svg():
@@ -40,6 +49,13 @@ def create_svg():
 
 def parse_cli_arguments():
     parser = argparse.ArgumentParser(description="Munchkin card generator")
+    parser.add_argument(
+        "mode",
+        nargs="?",
+        choices=["generate", "simulate"],
+        default="generate",
+        help="Generate cards or simulate fights to balance the deck",
+    )
     parser.add_argument("spreadsheet_id", type=str, help="Google spreadsheet ID with data to based cards on")
     parser.add_argument(
         "-s",
@@ -52,48 +68,164 @@ def parse_cli_arguments():
     parser.add_argument(
         "-o", "--output", type=Path, metavar="output", help="Output directory", default="output/munchkin"
     )
+    parser.add_argument(
+        "--validate-only", action="store_true", help="Only check data in the spreadsheet, do not render anything"
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Only print page counts and estimated render time, do not render anything",
+    )
+    parser.add_argument(
+        "--renderer",
+        choices=["svg", "native"],
+        default="svg",
+        help="Render PDF from written SVG files with cairosvg or draw pages directly with cairo",
+    )
+    parser.add_argument("--compact", action="store_true", help="Write compacted SVG files")
+    parser.add_argument(
+        "--precision", type=int, default=2, help="Number of decimal places of coordinates in compacted SVG files"
+    )
+    parser.add_argument("--svgz", action="store_true", help="Write gzip compressed .svgz files")
+    parser.add_argument(
+        "--split",
+        type=is_positive_int,
+        metavar="pages",
+        help="Split PDF into multiple files with at most this many pages",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=is_positive_int,
+        metavar="MB",
+        help="Stop rendering when the process uses more memory than this",
+    )
+    parser.add_argument("--only", nargs="+", choices=list(TYPES), help="Fetch and render only cards of these types")
+    parser.add_argument(
+        "--match", action="append", metavar="pattern", help="Render only cards with ID matching the glob, e.g. 'drak*'"
+    )
+    parser.add_argument(
+        "--rarity", type=NumberRanges, help="Render only equipment and bonuses with bonus in ranges, e.g. 3-5"
+    )
+    parser.add_argument(
+        "--monster-level", type=NumberRanges, help="Render only monsters with level in ranges, e.g. 10-"
+    )
+    parser.add_argument(
+        "--pages", type=NumberRanges, help="Render only pages with these numbers of the selected cards, e.g. 3-5"
+    )
+    parser.add_argument("--rounds", type=is_positive_int, default=200_000, help="Number of simulated fights")
+    parser.add_argument("--hand", type=int, default=5, help="Number of treasure cards drawn before each fight")
+    parser.add_argument("--level", type=int, default=1, help="Level of the player in simulated fights")
+    parser.add_argument("--seed", type=int, help="Seed for the simulation")
 
     # parse the arguments from standard input
     return parser.parse_args()
 
 
+def create_page(paged_entities: list) -> SVG:
+    svg, defs = create_svg()
+
+    for entity in set(paged_entities):
+        defs.elements.append(entity.symbol)
+
+    x = 0
+    y = 0
+    for equipment in paged_entities:
+        svg.elements.append(Use(href="#" + equipment.symbol.id, x=x * 80, y=y * 30, width=80, height=30))
+        x += 1
+        if x == COLUMNS:
+            x = 0
+            y += 1
+    return svg
+
+
+def create_plan(unique_entities: list, pages: list[list], page_cost: float, calibrated: bool) -> Plan:
+    plan = Plan(pages=len(pages), page_cost=page_cost, calibrated=calibrated)
+    for entity_type in (Bonus, Monster, Equipment, Curse):
+        typed = [entity for entity in unique_entities if isinstance(entity, entity_type)]
+        cards = sum(int(entity.amount) for entity in typed)
+        typed_pages = sum(1 for page in pages if any(isinstance(entity, entity_type) for entity in page))
+        plan.details.append((entity_type.__name__, f"{len(typed)} unique, {cards} cards on {typed_pages} pages"))
+    cards = sum(len(page) for page in pages)
+    unique = len(set(unique_entities))
+    definitions = sum(len(set(page)) for page in pages)
+    plan.details.append(
+        ("Symbols", f"{unique} unique, {cards - unique} repeated cards, {definitions} symbol definitions in all pages")
+    )
+    return plan
+
+
+def fetch_rows(loader, spreadsheet_id, entity_types=tuple(RANGES)) -> dict[type, list[list[str]]]:
+    return {entity: loader.get_spreadsheet_range(spreadsheet_id, RANGES[entity]) for entity in entity_types}
+
+
+def validate_rows(rows: dict[type, list[list[str]]]) -> list[CellError]:
+    return [error for entity, values in rows.items() for error in entity.SCHEMA.validate(RANGES[entity], values)]
+
+
+def load_entities(rows: dict[type, list[list[str]]]):
+    equipment = [Equipment.from_list(value) for value in rows.get(Equipment, [])]
+    monsters = [Monster.from_list(value) for value in rows.get(Monster, [])]
+    curses = [Curse.from_list(value) for value in rows.get(Curse, [])]
+    bonuses = [Bonus.from_list(value) for value in rows.get(Bonus, [])]
+    return equipment, monsters, curses, bonuses
+
+
 def main():
     args = parse_cli_arguments()
 
     loader = GoogleSpreadsheetLoader(client_secret_path=args.secret)
-    equipment = [
-        Equipment.from_list(value) for value in loader.get_spreadsheet_range(args.spreadsheet_id, EQUIPMENT_RANGE)
-    ]
-    monsters = [Monster.from_list(value) for value in loader.get_spreadsheet_range(args.spreadsheet_id, MONSTER_RANGE)]
-    curses = [Curse.from_list(value) for value in loader.get_spreadsheet_range(args.spreadsheet_id, CURSE_RANGE)]
-    bonuses = [Bonus.from_list(value) for value in loader.get_spreadsheet_range(args.spreadsheet_id, BONUS_RANGE)]
+    # Simulation always needs the whole deck
+    if args.only and args.mode == "generate":
+        rows = fetch_rows(loader, args.spreadsheet_id, [TYPES[name] for name in args.only])
+    else:
+        rows = fetch_rows(loader, args.spreadsheet_id)
+    report_errors(validate_rows(rows), args.validate_only)
+    equipment, monsters, curses, bonuses = load_entities(rows)
+
+    if args.mode == "simulate":
+        result = simulate(
+            equipment, monsters, curses, bonuses, rounds=args.rounds, hand=args.hand, level=args.level, seed=args.seed
+        )
+        print(format_report(result))
+        return
+
+    index = build_index(bonuses + monsters + equipment + curses)
+    selected = select(index, patterns=args.match, rarities=args.rarity, levels=args.monster_level)
+    # Pages are numbered from 1 as they are in the whole selection, so files of a partial render keep their names
+    entities = {
+        number: paged_entities
+        for number, paged_entities in enumerate(
+            cluster(expand([entry.entity for entry in selected]), ROWS * COLUMNS), start=1
+        )
+        if args.pages is None or number in args.pages
+    }
+    unique_entities = list(dict.fromkeys(entity for paged_entities in entities.values() for entity in paged_entities))
 
-    unique_entities = bonuses + monsters + equipment + curses
-    entities = cluster(expand(unique_entities), ROWS * COLUMNS)
+    if args.plan:
+        print(create_plan(unique_entities, list(entities.values()), *load_page_cost(args.output, args.renderer)))
+        return
+    if not entities:
+        sys.exit("Nothing matches the selection")
 
     output = args.output
     output.mkdir(parents=True, exist_ok=True)
 
-    for count, paged_entities in enumerate(entities):
-        svg, defs = create_svg()
-
-        for entity in set(paged_entities):
-            defs.elements.append(entity.symbol)
-
-        x = 0
-        y = 0
-        for equipment in paged_entities:
-            svg.elements.append(Use(href="#" + equipment.symbol.id, x=x * 80, y=y * 30, width=80, height=30))
-            x += 1
-            if x == COLUMNS:
-                x = 0
-                y += 1
-
-        with open(output.joinpath(f"file{count}.svg"), "w") as file:
-            file.write(svg.as_str())
-
-    paths = glob(str(output.joinpath("*.svg")))
-    convert_list(paths, str(output.joinpath("output.pdf")))
+    start = time.perf_counter()
+    # Pages are created one by one while they are written, only one page tree is kept in memory at a time
+    pages = ((number, create_page(paged_entities)) for number, paged_entities in entities.items())
+    try:
+        if args.renderer == "native":
+            render_pdf((svg for _, svg in pages), str(output.joinpath("output.pdf")), **pdf_options(args))
+        else:
+            paths = []
+            for number, svg in pages:
+                path = output.joinpath(f"file{number}.svg")
+                paths.append(write_svg(svg, path, compact=args.compact, precision=args.precision, compress=args.svgz))
+
+            convert_list(paths, str(output.joinpath("output.pdf")), **pdf_options(args))
+    except MemoryError as error:
+        sys.exit(str(error))
+    save_page_cost(output, args.renderer, time.perf_counter() - start, len(entities))
 
 
 if __name__ == "__main__":
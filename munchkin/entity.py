@@ -10,6 +10,7 @@ from svg import Symbol, Text, Rect, Path, TSpan
 
 from base import generate_tspans
 from base.range_dict import RangeKeyDict
+from base.schema import Schema, Column, required, integer, one_of, mapped_by
 from base.text_utils import text_to_id
 
 
@@ -50,6 +51,13 @@ class BaseEntity(ABC):
 
 @dataclass(eq=True, frozen=True)
 class Equipment(BaseEntity):
+    SCHEMA = Schema(
+        Column("Name", required),
+        Column("Bonus", one_of(EQUIPMENT_RARITY)),
+        Column("Type", one_of(EquipmentType)),
+        None,
+        Column("Amount", integer),
+    )
     name: str
     bonus: int
     type: EquipmentType
@@ -118,6 +126,11 @@ class Equipment(BaseEntity):
 
 @dataclass(eq=True, frozen=True)
 class Monster(BaseEntity):
+    SCHEMA = Schema(
+        Column("Name", required),
+        Column("Level", mapped_by(DIFFICULTY, "is not in any difficulty tier")),
+        Column("Amount", integer),
+    )
     name: str
     level: int
 
@@ -178,6 +191,11 @@ class Monster(BaseEntity):
 
 @dataclass(eq=True, frozen=True)
 class Curse(BaseEntity):
+    SCHEMA = Schema(
+        Column("Name", required),
+        Column("Description", required),
+        Column("Amount", integer),
+    )
     name: str
     description: str
 
@@ -226,6 +244,12 @@ class Curse(BaseEntity):
 @dataclass(eq=True, frozen=True)
 class Bonus(BaseEntity):
     DESCRIPTION = "Lze použít jen jednou, musí být v batohu"
+    SCHEMA = Schema(
+        Column("Name", required),
+        Column("Bonus", one_of(EQUIPMENT_RARITY)),
+        None,
+        Column("Amount", integer),
+    )
     name: str
     bonus: int
 
@@ -0,0 +1,50 @@
+"""Lightweight index of parsed cards, used to select cards before their symbols are built and rendered"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from .entity import BaseEntity, Equipment, Monster, Curse, Bonus
+from base.selection import NumberRanges, matches
+from base.text_utils import text_to_id
+
+# Card types in the order of the deck
+TYPES = {"bonuses": Bonus, "monsters": Monster, "equipment": Equipment, "curses": Curse}
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    type: str
+    id: str
+    rarity: Optional[int]
+    level: Optional[int]
+    entity: BaseEntity
+
+
+def build_index(entities: list[BaseEntity]) -> list[IndexEntry]:
+    types = {entity_type: name for name, entity_type in TYPES.items()}
+    return [
+        IndexEntry(
+            type=types[type(entity)],
+            id=text_to_id(entity.name),
+            rarity=int(entity.bonus) if isinstance(entity, (Equipment, Bonus)) else None,
+            level=entity.level if isinstance(entity, Monster) else None,
+            entity=entity,
+        )
+        for entity in entities
+    ]
+
+
+def select(
+    index: list[IndexEntry],
+    patterns: list[str] = None,
+    rarities: NumberRanges = None,
+    levels: NumberRanges = None,
+) -> list[IndexEntry]:
+    """Returns entries matching all given filters, entries without rarity or level never match such filter"""
+    return [
+        entry
+        for entry in index
+        if matches(entry.id, patterns)
+        and (rarities is None or (entry.rarity is not None and entry.rarity in rarities))
+        and (levels is None or (entry.level is not None and entry.level in levels))
+    ]
@@ -0,0 +1,171 @@
+"""Monte Carlo simulation of fights, used for balancing the deck"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .entity import Equipment, Monster, Curse, Bonus, EquipmentType, DIFFICULTY
+
+# Codes of treasure cards in the simulated deck, equipment uses index of its EquipmentType
+EQUIPMENT_TYPES = list(EquipmentType)
+BONUS_CARD = len(EQUIPMENT_TYPES)
+CURSE_CARD = BONUS_CARD + 1
+
+
+@dataclass
+class TierStats:
+    name: str
+    fights: int
+    wins: int
+    average_power: float
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.fights if self.fights else 0.0
+
+
+@dataclass
+class EquipmentStats:
+    type: EquipmentType
+    equipped: int
+    wins: int
+    average_bonus: float
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.equipped if self.equipped else 0.0
+
+
+@dataclass
+class SimulationResult:
+    rounds: int
+    wins: int
+    tiers: list[TierStats]
+    equipment: list[EquipmentStats]
+
+
+# Upper limit of random keys generated at once while drawing hands
+DRAW_BATCH = 4_000_000
+
+
+def _weights(entities) -> np.ndarray:
+    amounts = np.array([entity.amount for entity in entities], dtype=float)
+    return amounts / amounts.sum()
+
+
+def _draw_hands(rng: np.random.Generator, amounts: list[int], rounds: int, hand: int) -> np.ndarray:
+    """
+    Draws `hand` cards without replacement for every round, returns indices of the drawn cards.
+    Every copy of a card gets a random key and the copies with `hand` smallest keys are drawn,
+    rounds are processed in batches to limit the memory used by the keys.
+    """
+    copies = np.repeat(np.arange(len(amounts)), amounts)
+    hand = min(hand, len(copies))
+    batch = max(1, DRAW_BATCH // len(copies))
+    hands = np.empty((rounds, hand), dtype=np.int64)
+    for start in range(0, rounds, batch):
+        keys = rng.random((min(batch, rounds - start), len(copies)))
+        hands[start : start + batch] = copies[np.argpartition(keys, hand - 1, axis=1)[:, :hand]]
+    return hands
+
+
+def simulate(
+    equipment: list[Equipment],
+    monsters: list[Monster],
+    curses: list[Curse],
+    bonuses: list[Bonus],
+    rounds: int = 200_000,
+    hand: int = 5,
+    level: int = 1,
+    seed: int | None = None,
+) -> SimulationResult:
+    """
+    Simulates `rounds` fights, all at once as NumPy arrays.
+    In each round player draws `hand` treasure cards from the whole deck (every copy at most once)
+    and fights a random monster.
+    Player equips the best item for every slot, all modifiers and uses all bonus cards.
+    Curse takes away the best item. Player wins if their power is strictly greater than the monster level.
+    """
+    if not monsters:
+        raise ValueError("There are no monsters to fight")
+    if rounds < 1:
+        raise ValueError("At least one round must be simulated")
+    rng = np.random.default_rng(seed)
+
+    deck = equipment + bonuses + curses
+    kinds = np.array(
+        [EQUIPMENT_TYPES.index(card.type) for card in equipment]
+        + [BONUS_CARD] * len(bonuses)
+        + [CURSE_CARD] * len(curses),
+        dtype=np.int8,
+    )
+    values = np.array([int(card.bonus) for card in equipment] + [card.bonus for card in bonuses] + [0] * len(curses))
+
+    items = np.zeros((rounds, len(EQUIPMENT_TYPES)), dtype=np.int64)
+    power = np.full(rounds, level, dtype=np.int64)
+    amounts = [int(card.amount) for card in deck]
+    if sum(amounts) > 0 and hand > 0:
+        hands = _draw_hands(rng, amounts, rounds, hand)
+        hand_kinds = kinds[hands]
+        hand_values = values[hands]
+        for index, equipment_type in enumerate(EQUIPMENT_TYPES):
+            slot = np.where(hand_kinds == index, hand_values, 0)
+            items[:, index] = slot.sum(axis=1) if equipment_type == EquipmentType.MODIFIER else slot.max(axis=1)
+        cursed = (hand_kinds == CURSE_CARD).any(axis=1)
+        items[cursed, items[cursed].argmax(axis=1)] = 0
+        power += items.sum(axis=1) + np.where(hand_kinds == BONUS_CARD, hand_values, 0).sum(axis=1)
+
+    # Tiers are ordered by the lowest monster level in them
+    tier_names = list(
+        dict.fromkeys(DIFFICULTY.get(monster.level, "?") for monster in sorted(monsters, key=lambda m: m.level))
+    )
+    monster_tiers = np.array([tier_names.index(DIFFICULTY.get(monster.level, "?")) for monster in monsters])
+    monster_levels = np.array([monster.level for monster in monsters])
+
+    fought = rng.choice(len(monsters), size=rounds, p=_weights(monsters))
+    wins = power > monster_levels[fought]
+    tiers = monster_tiers[fought]
+
+    fights = np.bincount(tiers, minlength=len(tier_names))
+    tier_wins = np.bincount(tiers, weights=wins, minlength=len(tier_names))
+    tier_power = np.bincount(tiers, weights=power, minlength=len(tier_names))
+    tier_stats = [
+        TierStats(
+            name=name,
+            fights=int(fights[index]),
+            wins=int(tier_wins[index]),
+            average_power=float(tier_power[index] / fights[index]) if fights[index] else 0.0,
+        )
+        for index, name in enumerate(tier_names)
+    ]
+
+    equipment_stats = []
+    for index, equipment_type in enumerate(EQUIPMENT_TYPES):
+        equipped = items[:, index] > 0
+        count = int(equipped.sum())
+        equipment_stats.append(
+            EquipmentStats(
+                type=equipment_type,
+                equipped=count,
+                wins=int(wins[equipped].sum()),
+                average_bonus=float(items[equipped, index].mean()) if count else 0.0,
+            )
+        )
+
+    return SimulationResult(rounds=rounds, wins=int(wins.sum()), tiers=tier_stats, equipment=equipment_stats)
+
+
+def format_report(result: SimulationResult) -> str:
+    lines = [f"Simulated fights: {result.rounds}, won: {result.wins / result.rounds:.1%}", "", "Difficulty:"]
+    for tier in result.tiers:
+        lines.append(
+            f"  {tier.name:<15} fights: {tier.fights / result.rounds:6.1%}  won: {tier.win_rate:6.1%}"
+            f"  average power: {tier.average_power:.1f}"
+        )
+    lines.extend(["", "Equipment:"])
+    for stats in result.equipment:
+        lines.append(
+            f"  {stats.type.value:<15} equipped: {stats.equipped / result.rounds:6.1%}  won: {stats.win_rate:6.1%}"
+            f"  average bonus: {stats.average_bonus:.1f}"
+        )
+    return "\n".join(lines)
@@ -3,14 +3,25 @@ import datetime
 import locale
 import logging
 import pathlib
-from functools import partial
 
 from base import is_file_path
 from base.google_api import GoogleSpreadsheetLoader
-from program.entity import DayPart, Day, ProgramType
+from base.schema import CellError, parse_range, report_errors
+from base.selection import matches
+from program.entity import DayPart, Day, ProgramType, validate_day_sheet
 from program.markdown import header, list_item, centered_header, Table, force_page_break
+from program.snapshot import (
+    day_values,
+    content_hash,
+    restore_parts,
+    load_snapshot,
+    save_snapshot,
+    compare_snapshots,
+    format_changes,
+)
 
 SUMMARY_RANGE = "'Přehled'!B2:E15"
+DAY_RANGE = "A1:I8"
 SHEET_PREFIX = "den "
 DAY_PARTS = {"Dopo", "Odpo", "Večer"}
 
@@ -32,48 +43,124 @@ def parse_cli_arguments():
         "-o", "--output", type=pathlib.Path, metavar="output", help="Output directory", default="output/"
     )
     parser.add_argument("--date", "-d", type=datetime.date.fromisoformat, required=True)
+    parser.add_argument(
+        "--validate-only", action="store_true", help="Only check data in the spreadsheet, do not render anything"
+    )
+    parser.add_argument(
+        "--match",
+        action="append",
+        metavar="pattern",
+        help="Fetch sheets only of days matching the glob, other days reuse their parts of the last run",
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="Render all days again instead of reusing unchanged days of the last run"
+    )
 
     # parse the arguments from standard input
     return parser.parse_args()
 
 
-def main():
-    args = parse_cli_arguments()
+def fetch_rows(
+    loader, spreadsheet_id: str, patterns: list[str] = None
+) -> tuple[list[str], list[list[str]], dict[str, list[list[str]]]]:
+    """
+    Returns names of day sheets, rows of the summary and rows of every day sheet matching the patterns,
+    all fetched by a single request
+    """
+    day_names = [title for title in loader.list_sheet_titles(spreadsheet_id) if title.startswith(SHEET_PREFIX)]
+    selected = [name for name in day_names if matches(name, patterns)]
 
-    output = args.output
-    output.mkdir(parents=True, exist_ok=True)
+    summary_raw, *rows = loader.get_spreadsheet_ranges(
+        spreadsheet_id, [SUMMARY_RANGE, *(f"'{name}'!{DAY_RANGE}" for name in selected)]
+    )
+    day_rows = {name: values for name, values in zip(selected, rows) if name in day_names[: len(summary_raw)]}
+    return day_names, summary_raw, day_rows
+
+
+def validate_rows(day_names, summary_raw, day_rows) -> list[CellError]:
+    sheet, _, first_row = parse_range(SUMMARY_RANGE)
+    errors = Day.SCHEMA.validate(SUMMARY_RANGE, summary_raw)
+    errors.extend(
+        CellError(sheet, f"B{first_row + number}", "", f"there is no '{SHEET_PREFIX}...' sheet for this day")
+        for number in range(len(day_names), len(summary_raw))
+    )
+    for name, rows in day_rows.items():
+        errors.extend(validate_day_sheet(name, rows))
+    return errors
 
-    loader = GoogleSpreadsheetLoader(client_secret_path=args.secret)
-    sheets = loader.get_spreadsheet(spreadsheet_id=args.spreadsheet_id)["sheets"]
-    get_range = partial(loader.get_spreadsheet_range, args.spreadsheet_id)
-    day_names = [
-        sheet["properties"]["title"] for sheet in sheets if sheet["properties"]["title"].startswith(SHEET_PREFIX)
-    ]
 
+def parse_day_parts(day: Day, rows: list[list[str]]):
+    for i in range(3):
+        start = i * 3
+        day_part_name = rows[start][0].split(":")[0].strip() if len(rows) > start and rows[start] else ""
+        if not day_part_name:
+            logger.warning(f"{i+1} part of the day not found for sheet {day.sheet_name}")
+            continue
+
+        values = {key: value.strip() for key, value in zip(rows[start][1:-1], rows[start + 1][1:-1]) if value.strip()}
+        day_part = DayPart(name=day_part_name, values=values, cth=rows[start + 1][-1] == "TRUE")
+        day.parts[ProgramType(day_part_name)] = day_part
+
+
+def load_days(day_names, summary_raw, day_rows, date: datetime.date, previous: dict[str, dict] = None) -> list[Day]:
+    """
+    Loads every day of the summary, parts of days without fetched sheets are restored from the previous snapshot.
+    Days with neither are skipped but still count for dates.
+    """
     days = []
-    # Summary parsing will be here
-    date = args.date
-    summary_raw = loader.get_spreadsheet_range(args.spreadsheet_id, SUMMARY_RANGE)
     for number, row in enumerate(summary_raw):
-        days.append(Day.from_row(row, date, number + 1, day_names[number]))
+        name = day_names[number]
+        if name in day_rows or (previous and name in previous):
+            day = Day.from_row(row, date, number + 1, name)
+            if name in day_rows:
+                parse_day_parts(day, day_rows[name])
+            else:
+                day.parts = restore_parts(previous[name]["values"])
+            days.append(day)
         date = date + datetime.timedelta(days=1)
+    return days
+
 
+def render_day(day: Day) -> str:
+    """Renders detailed program of a single day"""
+    result = f"""
+{force_page_break()}
+<h1 style="text-align: center">{day.sheet_name} - {day.date.strftime('%d.%m.%Y')}</h1>
+<p style="text-align: center"><b>{day.guarantees}</b></p>\n
+"""
+    for program_type, day_part in day.parts.items():
+        if day_part.values:
+            name = day_part.values.get("Název")
+            heading = f"{program_type.value}: {name}" if name else program_type.value
+            heading = f"{heading} (CTH)" if day_part.cth else heading
+            result += header(level=3, text=heading)
+            for key, value in day_part.values.items():
+                if key != "Název":
+                    formatted_value = value.replace("\n", "<br>").strip()
+                    key = f"<span style='color: orange'>{key}</span>" if key == "Materiály" else key
+                    result += list_item(f"**{key}**: {formatted_value}\n")
+    return result
+
+
+def render_days(days: list[Day], previous: dict[str, dict], full: bool = False) -> dict[str, dict]:
+    """
+    Renders sections of all days, sections of days unchanged since the previous snapshot are reused.
+    Returns new snapshot of every day by its sheet name.
+    """
+    snapshot = {}
     for day in days:
-        rows = get_range(f"'{day.sheet_name}'!A1:I8")
-        for i in range(3):
-            start = i * 3
-            day_part_name = rows[start][0].split(":")[0].strip()
-            if not day_part_name:
-                logger.warning(f"{i+1} part of the day not found for sheet {day.sheet_name}")
-                continue
-
-            values = {
-                key: value.strip() for key, value in zip(rows[start][1:-1], rows[start + 1][1:-1]) if value.strip()
-            }
-            day_part = DayPart(name=day_part_name, values=values, cth=rows[start + 1][-1] == "TRUE")
-            day.parts[ProgramType(day_part_name)] = day_part
-
-    result = ""
+        values = day_values(day)
+        cached = previous.get(day.sheet_name)
+        day_hash = content_hash(values)
+        if full or not cached or cached["hash"] != day_hash:
+            section = render_day(day)
+        else:
+            section = cached["section"]
+        snapshot[day.sheet_name] = {"hash": day_hash, "values": values, "section": section}
+    return snapshot
+
+
+def create_summary(days: list[Day], sections: list[str] = None) -> str:
     summary_table = Table(headers=["Den", "Zátěž", "Dopo", "Odpo", "Večer", "Garanti"])
     for day in days:
         summary_table.add_row(
@@ -86,25 +173,32 @@ def main():
                 day.guarantees,
             ]
         )
-        result += f"""
-{force_page_break()}
-<h1 style="text-align: center">{day.sheet_name} - {day.date.strftime('%d.%m.%Y')}</h1>
-<p style="text-align: center"><b>{day.guarantees}</b></p>\n
-"""
-        for program_type, day_part in day.parts.items():
-            if day_part.values:
-                name = day_part.values.get("Název")
-                heading = f"{program_type.value}: {name}" if name else program_type.value
-                heading = f"{heading} (CTH)" if day_part.cth else heading
-                result += header(level=3, text=heading)
-                for key, value in day_part.values.items():
-                    if key != "Název":
-                        formatted_value = value.replace("\n", "<br>").strip()
-                        key = f"<span style='color: orange'>{key}</span>" if key == "Materiály" else key
-                        result += list_item(f"**{key}**: {formatted_value}\n")
+    result = "".join(sections if sections is not None else (render_day(day) for day in days))
+    return centered_header(level=1, text="Přehled") + summary_table.as_markdown() + result
+
 
+def main():
+    args = parse_cli_arguments()
+
+    loader = GoogleSpreadsheetLoader(client_secret_path=args.secret)
+    day_names, summary_raw, day_rows = fetch_rows(loader, args.spreadsheet_id, args.match)
+    report_errors(validate_rows(day_names, summary_raw, day_rows), args.validate_only)
+
+    output = args.output
+    output.mkdir(parents=True, exist_ok=True)
+
+    previous = load_snapshot(output)
+    # Summary rows are always fetched, so only parts of days outside of the selection come from the snapshot
+    days = load_days(day_names, summary_raw, day_rows, args.date, previous)
+    snapshot = render_days(days, previous, args.full)
     with open(output.joinpath("summary.md"), "w") as file:
-        file.write(centered_header(level=1, text="Přehled") + summary_table.as_markdown() + result)
+        file.write(create_summary(days, [snapshot[day.sheet_name]["section"] for day in days]))
+
+    changes = format_changes(compare_snapshots(previous, snapshot))
+    with open(output.joinpath("changes.md"), "w") as file:
+        file.write(changes)
+    save_snapshot(output, snapshot)
+    print(changes, end="")
 
 
 if __name__ == "__main__":
@@ -2,6 +2,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from enum import StrEnum
 
+from base.schema import Schema, Column, CellError, required, integer
+
 
 @dataclass
 class DayPart:
@@ -20,12 +22,38 @@ class ProgramType(StrEnum):
     EVENING = "Večer"
 
 
+def validate_day_sheet(sheet_name: str, rows: list[list[str]]) -> list[CellError]:
+    """
+    Validates sheet with the program for a single day.
+    Every part of the day takes 3 rows, the first one starts with the name of the part followed by keys,
+    the second one contains values.
+    """
+    errors = []
+    for start in range(0, 9, 3):
+        name = rows[start][0].split(":")[0].strip() if len(rows) > start and rows[start] else ""
+        if not name:
+            continue
+        if name not in list(ProgramType):
+            errors.append(CellError(sheet_name, f"A{start + 1}", name, f"must be one of {', '.join(ProgramType)}"))
+        # Sheets API returns empty list for an empty row in the middle of the range
+        if len(rows) <= start + 1 or not rows[start + 1]:
+            errors.append(CellError(sheet_name, f"A{start + 2}", "", f"{name} has no values"))
+    return errors
+
+
 @dataclass
 class Day:
     """
     Represents a complete program for the day
     """
 
+    SCHEMA = Schema(
+        Column("Physical", integer),
+        Column("Psychical", integer),
+        None,
+        Column("Guarantees", required),
+    )
+
     day_number: int
     date: datetime
     sheet_name: str
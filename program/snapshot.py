@@ -0,0 +1,127 @@
+"""Per-day snapshot of the last rendered program, used to re-render and report only the changed days"""
+
+import datetime
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from program.entity import Day, DayPart, ProgramType
+
+SNAPSHOT_FILE = ".program-snapshot.json"
+# Bump whenever rendering of a day changes, so sections rendered by an older version are not reused
+SNAPSHOT_VERSION = 1
+# Fields and keys of the day shown in the summary table
+SUMMARY_FIELDS = {"date", "physical load", "psychical load", "guarantees"}
+SUMMARY_KEYS = {"Název"}
+DAY_FIELDS = {
+    "date": "date",
+    "guarantees": "guarantees",
+    "theme": "theme",
+    "physical": "physical load",
+    "psychical": "psychical load",
+}
+
+
+def day_values(day: Day) -> dict:
+    """Returns plain values of the day, keeps the order of keys as it is in the sheet"""
+    return {
+        "date": day.date.isoformat(),
+        "guarantees": day.guarantees,
+        "theme": day.theme,
+        "physical": day.physical,
+        "psychical": day.psychical,
+        "parts": {
+            program_type.value: {"name": part.name, "cth": part.cth, "values": part.values}
+            for program_type, part in day.parts.items()
+        },
+    }
+
+
+def restore_parts(values: dict) -> dict[ProgramType, DayPart]:
+    """Creates parts of the day back from its snapshot values, used for days whose sheets were not fetched"""
+    return {ProgramType(name): DayPart(**part) for name, part in values["parts"].items()}
+
+
+def content_hash(values: dict) -> str:
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def load_snapshot(output: Path) -> dict[str, dict]:
+    """Returns snapshot of every day by its sheet name, empty one if there is no usable snapshot"""
+    try:
+        with open(output.joinpath(SNAPSHOT_FILE), encoding="utf-8") as file:
+            snapshot = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return snapshot.get("days", {}) if snapshot.get("version") == SNAPSHOT_VERSION else {}
+
+
+def save_snapshot(output: Path, days: dict[str, dict]):
+    with open(output.joinpath(SNAPSHOT_FILE), "w", encoding="utf-8") as file:
+        json.dump({"version": SNAPSHOT_VERSION, "days": days}, file, ensure_ascii=False)
+
+
+@dataclass
+class DayChange:
+    sheet_name: str
+    status: str
+    fields: list[str] = field(default_factory=list)
+    parts: dict[str, list[str]] = field(default_factory=dict)
+
+    @property
+    def affects_summary(self) -> bool:
+        return (
+            self.status != "changed"
+            or bool(SUMMARY_FIELDS.intersection(self.fields))
+            or any(not keys or SUMMARY_KEYS.intersection(keys) for keys in self.parts.values())
+        )
+
+    def __str__(self):
+        if self.status != "changed":
+            return f"{self.sheet_name}: {self.status}"
+        changes = list(self.fields)
+        changes.extend(f"{part} ({', '.join(keys)})" if keys else part for part, keys in self.parts.items())
+        return f"{self.sheet_name}: {', '.join(changes) or 'order of values'}"
+
+
+def compare_day(sheet_name: str, old: dict, new: dict) -> DayChange:
+    """Lists fields, parts of the day and their keys that differ between two snapshots of the same day"""
+    change = DayChange(sheet_name, "changed")
+    change.fields = [label for name, label in DAY_FIELDS.items() if old[name] != new[name]]
+    for part in dict.fromkeys([*old["parts"], *new["parts"]]):
+        old_part, new_part = old["parts"].get(part), new["parts"].get(part)
+        if old_part is None or new_part is None:
+            change.parts[f"{part} {'added' if old_part is None else 'removed'}"] = []
+            continue
+        keys = [
+            key
+            for key in dict.fromkeys([*old_part["values"], *new_part["values"]])
+            if old_part["values"].get(key) != new_part["values"].get(key)
+        ]
+        if old_part["cth"] != new_part["cth"]:
+            keys.append("CTH")
+        if keys:
+            change.parts[part] = keys
+    return change
+
+
+def compare_snapshots(old: dict[str, dict], new: dict[str, dict]) -> list[DayChange]:
+    """Returns changes of all days, in the order of the new snapshot followed by removed days"""
+    changes = []
+    for sheet_name, day in new.items():
+        if sheet_name not in old:
+            changes.append(DayChange(sheet_name, "added"))
+        elif old[sheet_name]["hash"] != day["hash"]:
+            changes.append(compare_day(sheet_name, old[sheet_name]["values"], day["values"]))
+    changes.extend(DayChange(sheet_name, "removed") for sheet_name in old if sheet_name not in new)
+    return changes
+
+
+def format_changes(changes: list[DayChange]) -> str:
+    if not changes:
+        return "No changes since the last run\n"
+    result = "".join(f"* {change}\n" for change in changes)
+    if any(change.affects_summary for change in changes):
+        result += "* summary table\n"
+    return result
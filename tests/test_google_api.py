@@ -0,0 +1,77 @@
+"""Requests to Google API are throttled and retried with backoff, time is simulated by a fake clock"""
+
+import json
+
+import pytest
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpMockSequence, HttpRequest
+
+from base import google_api
+from base.google_api import RequestScheduler
+
+URI = "https://sheets.googleapis.com/v4/spreadsheets/id/values/range"
+
+
+class FakeTime:
+    """Clock that only moves when something sleeps, records every sleep"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, delay: float):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def fake_time(monkeypatch) -> FakeTime:
+    # Backoff always waits the whole interval, so delays are predictable
+    monkeypatch.setattr(google_api.random, "uniform", lambda low, high: high)
+    return FakeTime()
+
+
+def create_request(responses: list[tuple[dict, str]]) -> HttpRequest:
+    http = HttpMockSequence(responses)
+    return HttpRequest(http, lambda response, content: json.loads(content), URI)
+
+
+def test_retries_rate_limit_and_server_error(fake_time):
+    scheduler = RequestScheduler(base_delay=1.0, clock=fake_time.clock, sleep=fake_time.sleep)
+    request = create_request(
+        [({"status": "429"}, ""), ({"status": "503"}, ""), ({"status": "200"}, '{"values": [["a"]]}')]
+    )
+
+    assert scheduler.execute(request) == {"values": [["a"]]}
+    assert fake_time.sleeps == [1.0, 2.0]
+    assert scheduler.stats() == {"requests": 3, "retries": 2, "throttle_time": 0.0, "backoff_time": 3.0}
+
+
+def test_gives_up_after_max_retries(fake_time):
+    scheduler = RequestScheduler(max_retries=1, clock=fake_time.clock, sleep=fake_time.sleep)
+    request = create_request([({"status": "503"}, ""), ({"status": "503"}, "")])
+
+    with pytest.raises(HttpError):
+        scheduler.execute(request)
+    assert scheduler.stats()["requests"] == 2
+    assert scheduler.stats()["retries"] == 1
+
+
+def test_does_not_retry_client_error(fake_time):
+    scheduler = RequestScheduler(clock=fake_time.clock, sleep=fake_time.sleep)
+
+    with pytest.raises(HttpError):
+        scheduler.execute(create_request([({"status": "404"}, "")]))
+    assert scheduler.stats()["retries"] == 0
+
+
+def test_throttles_over_quota(fake_time):
+    scheduler = RequestScheduler(requests_per_minute=1, clock=fake_time.clock, sleep=fake_time.sleep)
+
+    for _ in range(2):
+        scheduler.execute(create_request([({"status": "200"}, "{}")]))
+    assert fake_time.sleeps == [60.0]
+    assert scheduler.stats() == {"requests": 2, "retries": 0, "throttle_time": 60.0, "backoff_time": 0.0}
@@ -0,0 +1,86 @@
+"""Native renderer must draw the same pixels as the cairosvg pipeline, speed is compared by `make benchmark`"""
+
+import numpy as np
+import pytest
+
+try:
+    import cairocffi  # noqa: F401
+except OSError:  # cairocffi is installed, but the cairo library itself is missing
+    pytest.skip("cairo library is not available", allow_module_level=True)
+
+pdfium = pytest.importorskip("pypdfium2")
+
+from base.native_render import render_pdf
+from base.pdf import convert_list
+from base.serialization import write_svg
+from munchkin import __main__ as munchkin
+from munchkin.entity import Equipment, EquipmentType, Monster, Curse, Bonus
+from vampires import __main__ as vampires
+from vampires.chain import link_chain
+from vampires.entity import Person
+
+# Pixels per point of rasterized pages
+SCALE = 2
+# Difference of a color channel still treated as antialiasing noise
+NOISE = 64
+# Share of pixels that may differ more than the noise
+TOLERANCE = 0.005
+
+CARDS = {
+    "equipment": Equipment(amount=1, name="Meč osudu", bonus="3", type=EquipmentType.ARM, condition="Jen pro elfy"),
+    "modifier": Equipment(amount=1, name="Ostří", bonus="1", type=EquipmentType.MODIFIER, condition=None),
+    "monster": Monster(amount=1, name="Drak", level=12),
+    "curse": Curse(amount=1, name="Smůla", description="Ztratíš nejlepší vybavení, které máš právě na sobě"),
+    "bonus": Bonus(amount=1, name="Lektvar síly", bonus=2),
+}
+
+
+def create_chain() -> list[Person]:
+    return link_chain(
+        [
+            Person(name="Anna", position=1, word="kočka", info_before="má ráda mléko", info_after=""),
+            Person(name="Petr", position=2, word="pes", info_before="štěká na pošťáka", info_after="je po Anně"),
+            Person(name="Eva", position=3, word="myš", info_before="", info_after="bojí se kočky i psa"),
+        ]
+    )
+
+
+def rasterize(path) -> list[np.ndarray]:
+    document = pdfium.PdfDocument(str(path))
+    try:
+        return [page.render(scale=SCALE).to_numpy().astype(np.int16) for page in document]
+    finally:
+        document.close()
+
+
+def render_both(pages, directory) -> tuple[list[np.ndarray], list[np.ndarray]]:
+    """Renders pages through SVG files and cairosvg and directly with cairo, returns both rasterized"""
+    paths = [write_svg(page, directory.joinpath(f"page{number}.svg")) for number, page in enumerate(pages)]
+    convert_list(paths, str(directory.joinpath("svg.pdf")))
+    render_pdf(pages, str(directory.joinpath("native.pdf")))
+    return rasterize(directory.joinpath("svg.pdf")), rasterize(directory.joinpath("native.pdf"))
+
+
+def assert_same_pixels(expected: list[np.ndarray], actual: list[np.ndarray]):
+    assert len(actual) == len(expected)
+    for number, (svg_page, native_page) in enumerate(zip(expected, actual)):
+        assert native_page.shape == svg_page.shape, f"page {number} has different size"
+        # Page with nothing drawn would trivially match another almost empty page
+        assert (svg_page < 255 - NOISE).any(), f"page {number} is empty"
+        differs = (np.abs(svg_page - native_page).max(axis=2) > NOISE).mean()
+        assert differs < TOLERANCE, f"page {number}: {differs:.2%} of pixels differ"
+
+
+@pytest.mark.parametrize("card", CARDS.values(), ids=CARDS.keys())
+def test_card_matches_svg_renderer(card, tmp_path):
+    assert_same_pixels(*render_both([munchkin.create_page([card])], tmp_path))
+
+
+def test_full_page_matches_svg_renderer(tmp_path):
+    cards = list(CARDS.values()) * munchkin.ROWS
+    assert_same_pixels(*render_both([munchkin.create_page(cards[: munchkin.ROWS * munchkin.COLUMNS])], tmp_path))
+
+
+@pytest.mark.parametrize("create_page", [vampires.front_page, vampires.cover_page], ids=["front", "cover"])
+def test_vampire_pages_match_svg_renderer(create_page, tmp_path):
+    assert_same_pixels(*render_both([create_page(person) for person in create_chain()], tmp_path))
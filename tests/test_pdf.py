@@ -0,0 +1,78 @@
+"""PDF output is streamed page by page, memory must not grow with the size of the document"""
+
+import gc
+
+import pytest
+
+try:
+    import cairocffi  # noqa: F401
+except OSError:  # cairocffi is installed, but the cairo library itself is missing
+    pytest.skip("cairo library is not available", allow_module_level=True)
+
+from base.native_render import render_pdf
+from base.pdf import convert_list, current_memory
+from base.serialization import write_svg
+from vampires import __main__ as vampires
+from vampires.entity import Person
+
+PAGES = 1000
+# Pages rendered before the first measurement, so caches of cairo and fonts are already warm
+WARMUP = 100
+# Allowed growth of resident memory between the warmup and the last page
+MAX_GROWTH = 32 * 1024 * 1024
+
+
+def generate_pages(count: int):
+    """Yields distinct synthetic pages, every one is created only when it is needed"""
+    for number in range(count):
+        person = Person(
+            name=f"Osoba {number}",
+            position=number,
+            word=f"slovo {number}",
+            info_before=f"nápověda pro další osobu číslo {number}",
+            info_after=f"nápověda pro předchozí osobu číslo {number}",
+        )
+        person.before = person.after = person
+        yield vampires.cover_page(person) if number % 2 else vampires.front_page(person)
+
+
+def measure(items, memory: list[int]):
+    """Passes items through, records resident memory after the warmup and after the last item"""
+    for number, item in enumerate(items):
+        if number == WARMUP:
+            gc.collect()
+            memory.append(current_memory())
+        yield item
+    gc.collect()
+    memory.append(current_memory())
+
+
+def test_render_pdf_memory_stays_flat(tmp_path):
+    memory = []
+    paths = render_pdf(measure(generate_pages(PAGES), memory), str(tmp_path.joinpath("output.pdf")))
+
+    assert paths == [str(tmp_path.joinpath("output.pdf"))]
+    assert memory[1] - memory[0] < MAX_GROWTH
+
+
+def test_convert_list_memory_stays_flat(tmp_path):
+    memory = []
+    # SVG files are written only when convert_list asks for them
+    urls = (
+        write_svg(page, tmp_path.joinpath(f"page{number}.svg")) for number, page in enumerate(generate_pages(PAGES))
+    )
+    convert_list(measure(urls, memory), str(tmp_path.joinpath("output.pdf")))
+
+    assert memory[1] - memory[0] < MAX_GROWTH
+
+
+def test_split_output(tmp_path):
+    paths = render_pdf(generate_pages(5), str(tmp_path.joinpath("output.pdf")), pages_per_file=2)
+
+    assert paths == [str(tmp_path.joinpath(f"output-{number}.pdf")) for number in (1, 2, 3)]
+    assert all(tmp_path.joinpath(f"output-{number}.pdf").stat().st_size for number in (1, 2, 3))
+
+
+def test_memory_limit(tmp_path):
+    with pytest.raises(MemoryError, match="Memory limit"):
+        render_pdf(generate_pages(2), str(tmp_path.joinpath("output.pdf")), max_memory=1)
@@ -0,0 +1,105 @@
+"""Preview service answers from warm caches, errors are reported with matching HTTP statuses"""
+
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+try:
+    import cairocffi  # noqa: F401
+except OSError:  # cairocffi is installed, but the cairo library itself is missing
+    pytest.skip("cairo library is not available", allow_module_level=True)
+
+from base.file_loader import FileSpreadsheetLoader
+from base.server import RenderServer, RenderService
+from munchkin import __main__ as munchkin
+
+SHEETS = {
+    "Vybavení": ",Jméno,Bonus,Typ,Podmínka,Počet\n,Meč,3,Ruka,,2\n,Helma,1,Helma,Jen pro elfy,1\n",
+    "Příšerky": ",Jméno,Úroveň,Počet\n,Drak,12,2\n",
+    "Kletby": ",Jméno,Popis,Počet\n,Smůla,Ztratíš vše,1\n",
+    "Bonus": ",Jméno,Bonus,,Počet\n,Lektvar,2,,3\n",
+}
+
+
+@pytest.fixture
+def loader(tmp_path):
+    for title, content in SHEETS.items():
+        tmp_path.joinpath(f"{title}.csv").write_text(content, encoding="utf-8")
+    return FileSpreadsheetLoader(tmp_path)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(service: RenderService) -> str:
+        server = RenderServer(("127.0.0.1", 0), service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def get(url: str, headers: dict = None):
+    """Returns status, headers and body of the response, error statuses included"""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {})) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+
+def test_card_and_not_modified(loader, serve):
+    url = serve(RenderService(loader, munchkin_id="munchkin"))
+
+    status, headers, body = get(f"{url}/munchkin/cards/mec.svg")
+    assert status == 200
+    assert headers["Content-Type"] == "image/svg+xml"
+    assert "Meč" in body.decode("utf-8")
+
+    status, _, body = get(f"{url}/munchkin/cards/mec.svg", {"If-None-Match": headers["ETag"]})
+    assert status == 304
+    assert body == b""
+
+
+def test_pages_are_numbered_from_one(loader, serve):
+    url = serve(RenderService(loader, munchkin_id="munchkin"))
+
+    assert get(f"{url}/munchkin/pages/1.svg")[0] == 200
+    assert get(f"{url}/munchkin/pages/0.svg")[0] == 404
+    assert get(f"{url}/munchkin/pages/2.svg")[0] == 404
+
+
+def test_only_missing_items_are_not_found(loader, serve, monkeypatch):
+    url = serve(RenderService(loader, munchkin_id="munchkin"))
+    assert get(f"{url}/munchkin/cards/unknown.svg")[0] == 404
+    assert get(f"{url}/vampires/_/front/1.svg")[0] == 404
+
+    def broken_page(entities):
+        raise KeyError("bug in rendering")
+
+    monkeypatch.setattr(munchkin, "create_page", broken_page)
+    assert get(f"{url}/munchkin/pages/1.svg")[0] == 500
+
+
+def test_least_recently_used_output_is_evicted(loader, serve):
+    cards = ("mec", "helma", "drak")
+    sizes = {card: len(RenderService(loader, munchkin_id="munchkin").munchkin_card(card)) for card in cards}
+    # Room for the first card and either of the others, but not for all three
+    service = RenderService(
+        loader, munchkin_id="munchkin", cache_bytes=sizes["mec"] + max(sizes["helma"], sizes["drak"])
+    )
+    url = serve(service)
+
+    for card in ("mec", "helma", "mec", "drak"):
+        assert get(f"{url}/munchkin/cards/{card}.svg")[0] == 200
+
+    assert service.cache.get(("munchkin", "card", "mec")) is not None
+    assert service.cache.get(("munchkin", "card", "helma")) is None
+    assert service.cache.get(("munchkin", "card", "drak")) is not None
@@ -1,17 +1,28 @@
 import argparse
+import os
 import pathlib
-from glob import glob
-from itertools import islice
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from textwrap import dedent
+from typing import Iterator
 
 from svg import SVG, Style, Line, Text
 
-from base import is_file_path, generate_tspans
+from base import is_file_path, is_positive_int, generate_tspans
 from base.google_api import GoogleSpreadsheetLoader
-from base.pdf import convert_list
+from base.native_render import render_pdf
+from base.pdf import convert_list, pdf_options
+from base.plan import Plan, load_page_cost, save_page_cost
+from base.schema import report_errors
+from base.selection import NumberRanges, matches
+from base.serialization import write_svg
+from base.text_utils import text_to_id
+from vampires.chain import group_people, validate_groups, validate_chain, link_chain
 from vampires.entity import Person
 
-RANGE = "'zaklinadlo'!A2:F"
+RANGE = "'zaklinadlo'!A2:G"
 
 
 def parse_cli_arguments():
@@ -28,6 +39,50 @@ def parse_cli_arguments():
     parser.add_argument(
         "-o", "--output", type=pathlib.Path, metavar="output", help="Output directory", default="output/vampires"
     )
+    parser.add_argument(
+        "--validate-only", action="store_true", help="Only check data in the spreadsheet, do not render anything"
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Only print page counts and estimated render time, do not render anything",
+    )
+    parser.add_argument(
+        "--renderer",
+        choices=["svg", "native"],
+        default="svg",
+        help="Render PDF from written SVG files with cairosvg or draw pages directly with cairo",
+    )
+    parser.add_argument("--compact", action="store_true", help="Write compacted SVG files")
+    parser.add_argument(
+        "--precision", type=int, default=2, help="Number of decimal places of coordinates in compacted SVG files"
+    )
+    parser.add_argument("--svgz", action="store_true", help="Write gzip compressed .svgz files")
+    parser.add_argument(
+        "--split",
+        type=is_positive_int,
+        metavar="pages",
+        help="Split PDF into multiple files with at most this many pages",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=is_positive_int,
+        metavar="MB",
+        help="Stop rendering when the process uses more memory than this",
+    )
+    parser.add_argument(
+        "--combined", action="store_true", help="Render all groups into a single PDF instead of one PDF per group"
+    )
+    parser.add_argument("--positions", type=NumberRanges, help="Render only people on these positions, e.g. 10-20")
+    parser.add_argument(
+        "--match",
+        action="append",
+        metavar="pattern",
+        help="Render only people with name matching the glob, e.g. 'drak*'",
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=os.cpu_count(), help="Number of groups rendered in parallel"
+    )
 
     # parse the arguments from standard input
     return parser.parse_args()
@@ -52,102 +107,199 @@ def create_svg():
     return svg
 
 
-def main():
-    args = parse_cli_arguments()
-
-    output = args.output
-    output.mkdir(parents=True, exist_ok=True)
-
-    loader = GoogleSpreadsheetLoader(client_secret_path=args.secret)
-    people = [Person.from_list(value) for value in loader.get_spreadsheet_range(args.spreadsheet_id, RANGE)]
-    people.sort(key=lambda x: x.position)
-
-    # Create Double-linked linked list
-    previous = people[0]
-    for person in islice(people, 1, None):
-        person.before = previous
-        previous.after = person
-        previous = person
-
-    person = people[0]
-    while person is not None:
-        front_page = create_svg()
-        elements = [
-            Line(y1="148.5", y2="148.5", x1=0, x2=210, class_=["dashed"]),
-            Line(y1="178.5", y2="178.5", x1=0, x2=210, class_=["line"]),
-            Line(y1=297, y2="178.5", x1=70, x2=70, class_=["line"]),
-            Line(y1=297, y2="178.5", x1=140, x2=140, class_=["line"]),
-            Text(
-                y=190,
-                x=105,
-                text_anchor="middle",
-                class_=["big"],
-                text="Slovo",
-            ),
+def front_page(person: Person) -> SVG:
+    front_page = create_svg()
+    elements = [
+        Line(y1="148.5", y2="148.5", x1=0, x2=210, class_=["dashed"]),
+        Line(y1="178.5", y2="178.5", x1=0, x2=210, class_=["line"]),
+        Line(y1=297, y2="178.5", x1=70, x2=70, class_=["line"]),
+        Line(y1=297, y2="178.5", x1=140, x2=140, class_=["line"]),
+        Text(
+            y=190,
+            x=105,
+            text_anchor="middle",
+            class_=["big"],
+            text="Slovo",
+        ),
+        Text(
+            y=190,
+            x=35,
+            text_anchor="middle",
+            class_=["big"],
+            text="Před",
+        ),
+        Text(
+            y=190,
+            x=175,
+            text_anchor="middle",
+            class_=["big"],
+            text="Po",
+        ),
+        Text(
+            y=237,
+            x=105,
+            text_anchor="middle",
+            class_=["normal"],
+            text=person.word,
+        ),
+    ]
+    if person.before:
+        elements.append(
             Text(
-                y=190,
+                y=233,
                 x=35,
                 text_anchor="middle",
-                class_=["big"],
-                text="Před",
+                elements=generate_tspans(person.before.info_before.capitalize(), 30, dy=4, x=35, class_=["small"]),
             ),
+        )
+    if person.after:
+        elements.append(
             Text(
-                y=190,
+                y=233,
                 x=175,
                 text_anchor="middle",
-                class_=["big"],
-                text="Po",
-            ),
-            Text(
-                y=237,
-                x=105,
-                text_anchor="middle",
-                class_=["normal"],
-                text=person.word,
+                dominant_baseline="middle",
+                elements=generate_tspans(person.after.info_after.capitalize(), 30, dy=4, x=175, class_=["small"]),
             ),
-        ]
-        if person.before:
-            elements.append(
-                Text(
-                    y=233,
-                    x=35,
-                    text_anchor="middle",
-                    elements=generate_tspans(person.before.info_before.capitalize(), 30, dy=4, x=35, class_=["small"]),
-                ),
-            )
-        if person.after:
-            elements.append(
-                Text(
-                    y=233,
-                    x=175,
-                    text_anchor="middle",
-                    dominant_baseline="middle",
-                    elements=generate_tspans(person.after.info_after.capitalize(), 30, dy=4, x=175, class_=["small"]),
-                ),
+        )
+    front_page.elements.extend(elements)
+    return front_page
+
+
+def cover_page(person: Person) -> SVG:
+    cover_page = create_svg()
+    elements = [
+        Line(y1="178.5", y2="178.5", x1=0, x2=210, class_=["dashed"]),
+        Line(y1="148.5", y2="148.5", x1=0, x2=210, class_=["dashed"]),
+        Text(
+            y=243,
+            x=105,
+            text_anchor="middle",
+            class_=["title"],
+            text=person.name,
+        ),
+    ]
+    cover_page.elements.extend(elements)
+    return cover_page
+
+
+def select(people: list[Person], positions: NumberRanges = None, patterns: list[str] = None) -> list[Person]:
+    return [
+        person
+        for person in people
+        if (positions is None or person.position in positions) and matches(person.name, patterns)
+    ]
+
+
+def create_pages(
+    people: list[Person], positions: NumberRanges = None, patterns: list[str] = None
+) -> Iterator[tuple[str, SVG]]:
+    """
+    Yields named pages of selected people of a single chain in print order, whole chain is needed for the hints.
+    Pages are created only when they are consumed, so they can be written one by one.
+    """
+    for person in select(link_chain(people), positions, patterns):
+        yield f"front{person.position}", front_page(person)
+        yield f"cover{person.position}", cover_page(person)
+
+
+def render_group(
+    people: list[Person],
+    output: pathlib.Path,
+    pdf: bool,
+    write=write_svg,
+    native: bool = False,
+    options: dict = None,
+    selection: dict = None,
+) -> list[str]:
+    """Renders pages of a single chain, returns paths to written SVG files in print order"""
+    output.mkdir(parents=True, exist_ok=True)
+    pages = create_pages(people, **(selection or {}))
+    options = options or {}
+    if native:
+        if pdf:
+            render_pdf((page for _, page in pages), str(output.joinpath("output.pdf")), **options)
+        return []
+    paths = [write(page, output.joinpath(f"{name}.svg")) for name, page in pages]
+    if pdf:
+        convert_list(paths, str(output.joinpath("output.pdf")), **options)
+    return paths
+
+
+def render(groups: dict[str, list[Person]], args):
+    output = args.output
+    native = args.renderer == "native"
+    selection = {"positions": args.positions, "patterns": args.match}
+    # Groups without any selected person are not rendered at all
+    groups = {group: members for group, members in groups.items() if select(members, **selection)}
+    if args.combined and native:
+        pages = (page for members in groups.values() for _, page in create_pages(members, **selection))
+        render_pdf(pages, str(output.joinpath("output.pdf")), **pdf_options(args))
+        return
+
+    write = partial(write_svg, compact=args.compact, precision=args.precision, compress=args.svgz)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            # Sheet without groups keeps the original single chain layout
+            executor.submit(
+                render_group,
+                members,
+                output.joinpath(text_to_id(group)) if group else output,
+                not args.combined,
+                write,
+                native,
+                pdf_options(args),
+                selection,
             )
-        front_page.elements.extend(elements)
-        with open(output.joinpath(f"front{person.position}.svg"), "w") as file:
-            file.write(front_page.as_str())
-
-        cover_page = create_svg()
-        elements = [
-            Line(y1="178.5", y2="178.5", x1=0, x2=210, class_=["dashed"]),
-            Line(y1="148.5", y2="148.5", x1=0, x2=210, class_=["dashed"]),
-            Text(
-                y=243,
-                x=105,
-                text_anchor="middle",
-                class_=["title"],
-                text=person.name,
-            ),
+            for group, members in groups.items()
         ]
-        cover_page.elements.extend(elements)
-        with open(output.joinpath(f"cover{person.position}.svg"), "w") as file:
-            file.write(cover_page.as_str())
+        paths = [path for future in futures for path in future.result()]
+
+    if args.combined:
+        convert_list(paths, str(output.joinpath("output.pdf")), **pdf_options(args))
+
+
+def create_plan(groups: dict[str, list[Person]], combined: bool, page_cost: float, calibrated: bool) -> Plan:
+    people = sum(len(members) for members in groups.values())
+    plan = Plan(pages=2 * people, page_cost=page_cost, calibrated=calibrated)
+    for group, members in groups.items():
+        plan.details.append(
+            (f"Group '{group}'" if group else "Chain", f"{len(members)} people, {2 * len(members)} pages")
+        )
+    plan.details.append(("Front pages", people))
+    plan.details.append(("Cover pages", people))
+    plan.details.append(("PDF files", 1 if combined else len(groups)))
+    return plan
+
+
+def main():
+    args = parse_cli_arguments()
+
+    loader = GoogleSpreadsheetLoader(client_secret_path=args.secret)
+    rows = loader.get_spreadsheet_range(args.spreadsheet_id, RANGE)
+    errors = Person.SCHEMA.validate(RANGE, rows)
+    # Chains are checked with the rows that can be parsed, so all problems are reported at once
+    groups = group_people([Person.from_list(value) for value in rows if Person.SCHEMA.is_valid(value)])
+    errors.extend(validate_groups(groups))
+    errors.extend(error for group, members in groups.items() for error in validate_chain(group, members))
+    report_errors(errors, args.validate_only)
+
+    output = args.output
+    selected = {group: select(members, args.positions, args.match) for group, members in groups.items()}
+    selected = {group: members for group, members in selected.items() if members}
+    if args.plan:
+        print(create_plan(selected, args.combined, *load_page_cost(output, args.renderer)))
+        return
+    if not selected:
+        sys.exit("Nothing matches the selection")
+    output.mkdir(parents=True, exist_ok=True)
 
-        person = person.after
-    paths = glob(str(output.joinpath("*.svg")))
-    convert_list(paths, str(output.joinpath("output.pdf")))
+    start = time.perf_counter()
+    try:
+        render(groups, args)
+    except MemoryError as error:
+        sys.exit(str(error))
+    save_page_cost(output, args.renderer, time.perf_counter() - start, 2 * sum(map(len, selected.values())))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+"""Grouping, validation and linking of vampire chains"""
+
+from collections import defaultdict
+
+from base.text_utils import text_to_id
+from vampires.entity import Person
+
+# Positions are marked one by one only while the chain spans at most this many times more positions than it has
+MAX_SPAN_RATIO = 16
+
+
+def group_people(people: list[Person]) -> dict[str, list[Person]]:
+    """Splits people into independent chains by their group, keeps order of the groups from the sheet"""
+    groups = defaultdict(list)
+    for person in people:
+        groups[person.group].append(person)
+    return dict(groups)
+
+
+def validate_groups(groups: dict[str, list[Person]]) -> list[str]:
+    """Returns groups whose IDs, used as names of output directories, are empty or same as ID of another group"""
+    errors = []
+    ids = {}
+    for group in groups:
+        if not group:
+            continue
+        group_id = text_to_id(group)
+        if not group_id:
+            errors.append(f"Group '{group}': name has no letters or digits to name its directory")
+        elif group_id in ids:
+            errors.append(f"Group '{group}': has the same directory '{group_id}' as group '{ids[group_id]}'")
+        else:
+            ids[group_id] = group
+    return errors
+
+
+def missing_ranges(positions: set[int]) -> list[tuple[int, int]]:
+    """
+    Returns inclusive ranges of positions missing between the lowest and the highest one,
+    in linear time unless the positions are much sparser than `MAX_SPAN_RATIO`.
+    """
+    first = min(positions)
+    last = max(positions)
+    span = last - first + 1
+    if span == len(positions):
+        return []
+    if span > MAX_SPAN_RATIO * len(positions):
+        # Positions are too sparse to mark them all, there is at most one range per position anyway
+        ordered = sorted(positions)
+        return [
+            (previous + 1, current - 1) for previous, current in zip(ordered, ordered[1:]) if current - previous > 1
+        ]
+
+    present = bytearray(span)
+    for position in positions:
+        present[position - first] = 1
+    ranges = []
+    start = None
+    for offset, is_present in enumerate(present):
+        if not is_present and start is None:
+            start = first + offset
+        elif is_present and start is not None:
+            ranges.append((start, first + offset - 1))
+            start = None
+    return ranges
+
+
+def validate_chain(group: str, people: list[Person]) -> list[str]:
+    """Returns all problems of the chain, duplicate and missing positions and empty hints"""
+    label = f"Group '{group}'" if group else "Chain"
+    if not people:
+        return [f"{label}: is empty"]
+
+    errors = []
+    seen = {}
+    for person in people:
+        if person.position in seen:
+            errors.append(f"{label}: {person.name} and {seen[person.position].name} share position {person.position}")
+        else:
+            seen[person.position] = person
+
+    first = min(seen)
+    last = max(seen)
+    errors.extend(
+        f"{label}: position {start} is missing" if start == end else f"{label}: positions {start}-{end} are missing"
+        for start, end in missing_ranges(seen.keys())
+    )
+
+    for person in people:
+        if not person.word.strip():
+            errors.append(f"{label}: {person.name} has no word")
+        # Hint before is shown to the next person and hint after to the previous one
+        if person.position != last and not person.info_before.strip():
+            errors.append(f"{label}: {person.name} has no hint for the next person")
+        if person.position != first and not person.info_after.strip():
+            errors.append(f"{label}: {person.name} has no hint for the previous person")
+    return errors
+
+
+def link_chain(people: list[Person]) -> list[Person]:
+    """Orders validated chain by position and links it into double-linked list"""
+    first = min(person.position for person in people)
+    chain = [None] * len(people)
+    for person in people:
+        chain[person.position - first] = person
+
+    previous = None
+    for person in chain:
+        person.before = previous
+        if previous is not None:
+            previous.after = person
+        previous = person
+    return chain
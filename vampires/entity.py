@@ -1,14 +1,23 @@
 from dataclasses import dataclass
 from typing import Self, Optional
 
+from base.schema import Schema, Column, required, integer
+
 
 @dataclass
 class Person:
+    SCHEMA = Schema(
+        Column("Name", required),
+        None,
+        Column("Position", integer),
+        Column("Word", required),
+    )
     name: str
     position: int
     word: str
     info_before: str
     info_after: str
+    group: str = ""
     before: Optional[Self] = None
     after: Optional[Self] = None
 
@@ -18,6 +27,7 @@ class Person:
             name=raw_data[0],
             position=int(raw_data[2]),
             word=raw_data[3],
-            info_before=raw_data[4],
-            info_after=raw_data[5],
+            info_before=raw_data[4] if len(raw_data) > 4 else "",
+            info_after=raw_data[5] if len(raw_data) > 5 else "",
+            group=raw_data[6].strip() if len(raw_data) > 6 else "",
         )